@@ -0,0 +1,141 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class SourceCreate(BaseModel):
+    """
+    An RSS source to insert, or to update if its url already exists
+    """
+    name: str
+    url: str
+    category: Optional[str] = None
+    is_active: bool = True
+
+
+class ArticleCreate(BaseModel):
+    """
+    An article to insert, or to update if its url already exists. Fields left as None
+    keep their stored value on update; analysis_status is left to the pipeline
+    """
+    url: str
+    title: Optional[str] = None
+    content: Optional[str] = None
+    source_id: Optional[uuid.UUID] = None
+    published_at: Optional[datetime] = None
+
+
+class UpsertedRow(BaseModel):
+    id: uuid.UUID
+    url: str
+    inserted: bool
+
+
+class BulkUpsertResult(BaseModel):
+    """
+    Outcome of a bulk upsert; rows repeated in the request are applied once
+    """
+    inserted: int
+    updated: int
+    items: List[UpsertedRow]
+
+
+class ArticleSummary(BaseModel):
+    """
+    An article without its content, as returned by listings
+    """
+    id: uuid.UUID
+    url: str
+    title: Optional[str] = None
+    source_id: Optional[uuid.UUID] = None
+    published_at: Optional[datetime] = None
+    analysis_status: str
+    created_at: datetime
+
+
+class ArticlePage(BaseModel):
+    """
+    One page of a keyset-paginated listing. next_cursor is None on the last page
+    """
+    items: List[ArticleSummary]
+    next_cursor: Optional[str] = None
+
+
+class Article(ArticleSummary):
+    """
+    A single article with its content, as returned by lookups by id or url
+    """
+    content: Optional[str] = None
+
+
+class ArticleBatchRequest(BaseModel):
+    """
+    Ids of articles to fetch in one request
+    """
+    ids: List[uuid.UUID]
+
+
+class ArticleStatusUpdate(BaseModel):
+    """
+    New analysis status for an article
+    """
+    analysis_status: str
+
+
+class ArticleSearchResult(ArticleSummary):
+    """
+    An article matching a full-text query, with its relevance (higher is better)
+    """
+    rank: float
+
+
+class ArticleSearchPage(BaseModel):
+    """
+    One page of ranked search results. next_offset is None on the last page
+    """
+    items: List[ArticleSearchResult]
+    next_offset: Optional[int] = None
+
+
+class ArticleEmbedding(BaseModel):
+    """
+    One article's embedding vector
+    """
+    article_id: uuid.UUID
+    embedding: List[float]
+
+
+class ArticleEmbeddingBatch(BaseModel):
+    """
+    Embeddings from one model, stored together. Existing vectors for the same
+    (article, model, type) are replaced
+    """
+    model_name: str
+    embedding_type: str = "content"
+    items: List[ArticleEmbedding]
+
+
+class SimilaritySearch(BaseModel):
+    """
+    Nearest-neighbour query. ef_search trades latency for recall (None = service default)
+    """
+    embedding: List[float]
+    model_name: Optional[str] = None
+    embedding_type: str = "content"
+    limit: int = 10
+    ef_search: Optional[int] = None
+    source_id: Optional[uuid.UUID] = None
+    published_after: Optional[datetime] = None
+    published_before: Optional[datetime] = None
+
+
+class SimilarArticle(BaseModel):
+    """
+    A neighbour of the query vector; similarity is 1 - cosine distance
+    """
+    article_id: uuid.UUID
+    similarity: float
+    source_id: Optional[uuid.UUID] = None
+    published_at: Optional[datetime] = None
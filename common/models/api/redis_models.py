@@ -45,9 +45,19 @@ class MessageURLPayload(BaseModel):
     source_rss: str
 
 
+class MessageUserJobPayload(BaseModel):
+    """
+    Represents an analysis job submitted through the API gateway.
+    Whoever finishes the job writes the result to cache_key and updates job:{job_id}
+    """
+    url: str
+    job_id: str
+    cache_key: str
+
+
 class Message(BaseModel):
     """
     Represents the actual message data type passed through a message queue
     """
     header: MessageHeader
-    data: Union[MessageURLPayload, Any]  # Fixed for Python 3.9
+    data: Union[MessageURLPayload, MessageUserJobPayload, Any]  # Fixed for Python 3.9
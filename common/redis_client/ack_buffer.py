@@ -0,0 +1,183 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def acknowledge_many(client, group_name: str, ids_by_stream: Dict[str, List[str]]) -> int:
+    """
+    Acknowledges many messages across many streams in a single pipelined round trip.
+
+    One XACK is queued per stream (XACK accepts any number of IDs), and the whole
+    pipeline is sent at once.
+
+    Args:
+        client: The connected redis-py client instance.
+        group_name (str): The consumer group the messages were read under.
+        ids_by_stream (Dict[str, List[str]]): Redis message IDs to acknowledge, keyed by stream name.
+
+    Returns:
+        int: The total number of messages Redis reported as acknowledged.
+    """
+
+    ids_by_stream = {stream: ids for stream, ids in ids_by_stream.items() if ids}
+    if not ids_by_stream:
+        return 0
+
+    pipe = client.pipeline(transaction=False)
+    for stream_name, redis_message_ids in ids_by_stream.items():
+        pipe.xack(stream_name, group_name, *redis_message_ids)
+    results = pipe.execute()
+
+    acknowledged = 0
+    for (stream_name, redis_message_ids), result in zip(ids_by_stream.items(), results):
+        acknowledged += result
+        if result != len(redis_message_ids):
+            print(
+                f"Warning: Only {result} of {len(redis_message_ids)} acknowledgements on stream {stream_name} succeeded."
+            )
+
+    return acknowledged
+
+
+class RedisAckBuffer:
+    """
+    Collects acknowledgements and flushes them in batches instead of one XACK per message.
+
+    A flush happens when the buffer holds `max_pending` IDs, when `max_interval_s`
+    has passed since the last flush, or when `flush` is called explicitly. Reads made
+    through `read_with_flush` also flush an idle buffer once it falls due.
+
+    Attributes:
+            client: The connected redis-py client instance.
+            group_name (str): The consumer group the buffered messages belong to.
+            max_pending (int): Number of buffered IDs that triggers a flush.
+            max_interval_s (float): Maximum age in seconds of the oldest buffered ID before a flush.
+    """
+
+    def __init__(self, client, group_name: str, max_pending: int = 100, max_interval_s: float = 1.0):
+        """
+        client: The connected redis-py client instance.
+        group_name (str): The consumer group the buffered messages belong to.
+        max_pending (int): Number of buffered IDs that triggers a flush.
+        max_interval_s (float): Seconds between time-based flushes.
+        """
+
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1.")
+        if max_interval_s < 0:
+            raise ValueError("max_interval_s must not be negative.")
+
+        self.client = client
+        self.group_name = group_name
+        self.max_pending = max_pending
+        self.max_interval_s = max_interval_s
+
+        self._pending: Dict[str, List[str]] = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._pending_count
+
+    def add(self, stream_name: str, redis_message_id: str) -> int:
+        """
+        Buffers one acknowledgement and flushes if the count or time threshold is reached.
+
+        Returns:
+                int: The number of messages acknowledged by a triggered flush, otherwise 0.
+        """
+        return self.add_many([(stream_name, redis_message_id)])
+
+    def add_many(self, acks: Iterable[Tuple[str, str]]) -> int:
+        """
+        Buffers (stream_name, redis_message_id) pairs and flushes if a threshold is reached.
+
+        Returns:
+                int: The number of messages acknowledged by a triggered flush, otherwise 0.
+        """
+        with self._lock:
+            for stream_name, redis_message_id in acks:
+                self._pending.setdefault(stream_name, []).append(redis_message_id)
+                self._pending_count += 1
+
+        if self.is_due():
+            return self.flush()
+        return 0
+
+    def is_due(self) -> bool:
+        """
+        True when the buffer holds IDs and either the count or time threshold has been reached.
+        """
+        if not self._pending_count:
+            return False
+        if self._pending_count >= self.max_pending:
+            return True
+        return time.monotonic() - self._last_flush >= self.max_interval_s
+
+    def seconds_until_due(self) -> float:
+        """
+        Seconds until the time threshold is reached (0 if it already has).
+        """
+        return max(0.0, self.max_interval_s - (time.monotonic() - self._last_flush))
+
+    def read_with_flush(self, read: Callable[[Optional[int]], Any], block: Optional[int]) -> Any:
+        """
+        Runs a stream read, flushing buffered acknowledgements only when they are due.
+
+        While IDs are buffered, a blocking read is cut short at the time threshold. If it
+        returns nothing by then the consumer is idle, so the buffer is flushed and the read
+        resumes for the rest of the caller's block time.
+
+        Args:
+            read: Performs the read with the given block time in milliseconds (None = don't block).
+            block (Optional[int]): The caller's block time; 0 blocks until a message arrives.
+
+        Returns:
+            Whatever `read` returned.
+        """
+        if self.is_due():
+            self.flush()
+        if block is None or not self._pending_count:
+            return read(block)
+
+        wait_ms = max(1, int(self.seconds_until_due() * 1000))
+        if block:
+            wait_ms = min(wait_ms, block)
+        response = read(wait_ms)
+        if response:
+            return response
+
+        self.flush()
+        if not block:
+            return read(0)
+        if block > wait_ms:
+            return read(block - wait_ms)
+        return response
+
+    def flush(self) -> int:
+        """
+        Acknowledges every buffered ID in one pipelined round trip.
+
+        On failure the IDs are put back in the buffer so the next flush retries them.
+
+        Returns:
+                int: The number of messages Redis reported as acknowledged.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_count = 0
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        try:
+            return acknowledge_many(self.client, self.group_name, pending)
+        except Exception as e:
+            print(f"Error flushing {sum(len(ids) for ids in pending.values())} buffered acknowledgements: {e}")
+            with self._lock:
+                for stream_name, redis_message_ids in pending.items():
+                    self._pending.setdefault(stream_name, [])[:0] = redis_message_ids
+                    self._pending_count += len(redis_message_ids)
+            raise
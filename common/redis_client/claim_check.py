@@ -0,0 +1,164 @@
+import hashlib
+import os
+import zlib
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+from common.redis_client.codecs import CODEC_FIELD, LEGACY_CODEC, CodecError, get_codec
+
+"""
+Large payloads are moved out of the stream into a compressed, content-addressed key
+
+        1730908200123-0 : {
+            "codec": "msgpack",
+            "ref": "claimcheck:9f86d0...0a08",      <- zlib(payload) lives here, with a TTL
+            "header": <header encoded with codec>   <- kept inline for routing/prioritising
+        }
+
+Consumers get a ClaimCheckPayload in place of the decoded payload. The header can be read
+without touching Redis; anything else fetches and decodes the body on first access.
+"""
+
+CLAIM_CHECK_FIELD = "ref"
+HEADER_FIELD = "header"
+CLAIM_CHECK_PREFIX = "claimcheck:"
+
+CLAIM_CHECK_THRESHOLD_BYTES = int(os.getenv("CLAIM_CHECK_THRESHOLD_BYTES", 64 * 1024))
+CLAIM_CHECK_TTL_S = int(os.getenv("CLAIM_CHECK_TTL_S", 3 * 24 * 60 * 60))
+
+
+class ClaimCheckMissingError(Exception):
+    """
+    Raised when a referenced payload has expired or was deleted before it was resolved.
+    """
+
+
+class RedisClaimCheckStore:
+    """
+    Stores encoded payloads under keys derived from their SHA-256, compressed with zlib.
+
+    Identical payloads share one key, and every write or forward refreshes the TTL.
+
+    Attributes:
+            client: A redis-py client that returns raw bytes.
+            ttl_seconds (int): How long a payload lives after it was last written or forwarded.
+            compression_level (int): zlib compression level, 1 (fast) to 9 (small).
+    """
+
+    def __init__(self, client, ttl_seconds: int = CLAIM_CHECK_TTL_S, compression_level: int = 6):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.compression_level = compression_level
+
+    @staticmethod
+    def reference_for(payload: bytes) -> str:
+        return f"{CLAIM_CHECK_PREFIX}{hashlib.sha256(payload).hexdigest()}"
+
+    def put(self, payload: bytes, pipe=None) -> str:
+        """
+        Stores an encoded payload and returns its reference.
+
+        If a pipeline is given the writes are queued on it, so they go out in the same
+        round trip as the XADD that carries the reference.
+        """
+        reference = self.reference_for(payload)
+        target = pipe if pipe is not None else self.client.pipeline(transaction=False)
+
+        # NX skips recompressed rewrites of a payload we already hold; EXPIRE refreshes it either way
+        target.set(reference, zlib.compress(payload, self.compression_level), ex=self.ttl_seconds, nx=True)
+        target.expire(reference, self.ttl_seconds)
+
+        if pipe is None:
+            target.execute()
+        return reference
+
+    def touch(self, reference: str, pipe=None):
+        """
+        Refreshes the TTL of a stored payload when its reference is forwarded to another stream.
+        """
+        target = pipe if pipe is not None else self.client
+        target.expire(reference, self.ttl_seconds)
+
+    def get(self, reference: str) -> bytes:
+        """
+        Fetches and decompresses a stored payload.
+        """
+        compressed = self.client.get(reference)
+        if compressed is None:
+            raise ClaimCheckMissingError(f"Claim-check payload {reference} has expired or does not exist.")
+        return zlib.decompress(compressed)
+
+
+class ClaimCheckPayload(Mapping):
+    """
+    A message whose body lives in a RedisClaimCheckStore. Behaves like the decoded message
+    dictionary, but only fetches the body the first time a non-inline key is read.
+
+    Attributes:
+            reference (str): The claim-check key holding the compressed payload.
+            codec_name (str): The codec the payload was encoded with.
+            inline (Dict[str, Any]): Decoded fields kept in the stream entry, e.g. the header.
+    """
+
+    def __init__(self, store: RedisClaimCheckStore, fields: Dict[str, bytes]):
+        """
+        store (RedisClaimCheckStore): Where the referenced payload is stored.
+        fields (Dict[str, bytes]): The stream entry's fields, with names already decoded.
+        """
+        self._store = store
+        self._fields = fields
+        self._resolved: Optional[Any] = None
+
+        self.reference = fields[CLAIM_CHECK_FIELD]
+        if isinstance(self.reference, bytes):
+            self.reference = self.reference.decode("utf-8")
+
+        self.codec_name = fields.get(CODEC_FIELD, LEGACY_CODEC)
+        if isinstance(self.codec_name, bytes):
+            self.codec_name = self.codec_name.decode("utf-8")
+
+        self.inline: Dict[str, Any] = {}
+        if HEADER_FIELD in fields:
+            try:
+                self.inline[HEADER_FIELD] = get_codec(self.codec_name).decode(fields[HEADER_FIELD])
+            except Exception as e:
+                raise CodecError(f"Failed to decode inline header of {self.reference}: {e}") from e
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._resolved is not None
+
+    def resolve(self) -> Any:
+        """
+        Fetches and decodes the full message. The result is cached on the object.
+        """
+        if self._resolved is None:
+            payload = self._store.get(self.reference)
+            try:
+                self._resolved = get_codec(self.codec_name).decode(payload)
+            except Exception as e:
+                raise CodecError(f"Failed to decode '{self.codec_name}' payload {self.reference}: {e}") from e
+        return self._resolved
+
+    def to_fields(self) -> Dict[str, Any]:
+        """
+        The stream fields needed to forward this message without fetching its body.
+        """
+        return dict(self._fields)
+
+    def __getitem__(self, key):
+        if key in self.inline:
+            return self.inline[key]
+        return self.resolve()[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.inline or key in self.resolve()
+
+    def __iter__(self) -> Iterator:
+        return iter(self.resolve())
+
+    def __len__(self) -> int:
+        return len(self.resolve())
+
+    def __repr__(self) -> str:
+        return f"ClaimCheckPayload(reference={self.reference!r}, resolved={self.is_resolved})"
@@ -0,0 +1,137 @@
+import json
+import os
+from typing import Any, Dict
+
+"""
+Every stream message is tagged with the codec used to encode its payload
+
+        1730908200123-0 : {
+            "codec": "msgpack",
+            "payload": <bytes>
+        }
+
+Messages without a "codec" field were written before codecs existed and are JSON.
+"""
+
+CODEC_FIELD = "codec"
+PAYLOAD_FIELD = "payload"
+LEGACY_CODEC = "json"
+
+DEFAULT_CODEC = os.getenv("REDIS_STREAM_CODEC", "json")
+
+
+class CodecError(ValueError):
+    """
+    Raised when a payload cannot be decoded with the codec it was tagged with.
+    """
+
+
+class StreamCodec:
+    """
+    Base class for stream payload codecs. Subclasses turn a message into bytes and back.
+    """
+
+    name: str = ""
+
+    def encode(self, message: Any) -> bytes:
+        raise NotImplementedError("Please Implement this method")
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError("Please Implement this method")
+
+
+class JsonCodec(StreamCodec):
+    """
+    UTF-8 JSON. Compatible with every message published before codecs existed.
+    """
+
+    name = "json"
+
+    def encode(self, message: Any) -> bytes:
+        return json.dumps(message, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackCodec(StreamCodec):
+    """
+    Compact binary encoding. Smaller than JSON in Redis and faster to encode and decode.
+    """
+
+    name = "msgpack"
+
+    def __init__(self):
+        # Imported lazily so services that only read JSON don't need msgpack installed
+        import msgpack
+
+        self._msgpack = msgpack
+
+    def encode(self, message: Any) -> bytes:
+        return self._msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+
+_CODEC_TYPES = {
+    JsonCodec.name: JsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+_codecs: Dict[str, StreamCodec] = {}
+
+
+def register_codec(codec_type: type):
+    """
+    Makes a StreamCodec subclass available by its name to publishers and consumers.
+    """
+    if not codec_type.name:
+        raise ValueError("Codec must define a non-empty name.")
+    _CODEC_TYPES[codec_type.name] = codec_type
+    _codecs.pop(codec_type.name, None)
+
+
+def get_codec(name: str) -> StreamCodec:
+    """
+    Returns the shared codec instance registered under `name`.
+    """
+    codec = _codecs.get(name)
+    if codec is None:
+        if name not in _CODEC_TYPES:
+            raise ValueError(f"Unknown stream codec '{name}'. Known codecs: {list(_CODEC_TYPES)}")
+        codec = _codecs[name] = _CODEC_TYPES[name]()
+    return codec
+
+
+def encode_fields(message: Any, codec: StreamCodec) -> Dict[str, Any]:
+    """
+    Builds the XADD field map for a message, tagged with the codec that encoded it.
+    """
+    return {CODEC_FIELD: codec.name, PAYLOAD_FIELD: codec.encode(message)}
+
+
+def decode_fields(fields: Dict[bytes, bytes]) -> Dict[str, bytes]:
+    """
+    Decodes the field names of a raw stream entry. Values are left as bytes.
+    """
+    return {
+        (key.decode("utf-8") if isinstance(key, bytes) else key): value
+        for key, value in fields.items()
+    }
+
+
+def decode_payload(fields: Dict[str, bytes]) -> Any:
+    """
+    Decodes the payload of a stream entry using the codec it was tagged with.
+
+    Raises:
+            CodecError: if the codec is unknown or the payload is corrupted.
+    """
+    codec_name = fields.get(CODEC_FIELD, LEGACY_CODEC)
+    if isinstance(codec_name, bytes):
+        codec_name = codec_name.decode("utf-8")
+
+    try:
+        return get_codec(codec_name).decode(fields[PAYLOAD_FIELD])
+    except Exception as e:
+        raise CodecError(f"Failed to decode '{codec_name}' payload: {e}") from e
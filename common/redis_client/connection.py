@@ -1,23 +1,162 @@
 import os
+import socket
 import threading
+import time
 
 import redis
+from redis.cluster import ClusterNode, RedisCluster
+
+from common.requests.retry_request import RetryPolicy
+
+
+def _env_float(name: str, default):
+    """
+    Reads an optional float from the environment. An empty value means None (no limit).
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return float(value) if value.strip() else None
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
 
-from common.requests.retry_request import exponential_retry
 
 REDIS_HOST = str(os.getenv("REDIS_HOST", "redis"))
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_DB = int(os.getenv("REDIS_DB", 0))
+
+# Pool sizing. Callers wait up to REDIS_POOL_TIMEOUT_S for a free connection before failing.
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT_S = _env_float("REDIS_POOL_TIMEOUT_S", 5.0)
+
+# Socket behaviour. REDIS_SOCKET_TIMEOUT_S must be longer than the longest blocking XREADGROUP,
+# so it defaults to no timeout.
+REDIS_SOCKET_TIMEOUT_S = _env_float("REDIS_SOCKET_TIMEOUT_S", None)
+REDIS_SOCKET_CONNECT_TIMEOUT_S = _env_float("REDIS_SOCKET_CONNECT_TIMEOUT_S", 5.0)
+REDIS_SOCKET_KEEPALIVE = _env_bool("REDIS_SOCKET_KEEPALIVE", True)
+REDIS_KEEPALIVE_IDLE_S = int(os.getenv("REDIS_KEEPALIVE_IDLE_S", 60))
+REDIS_KEEPALIVE_INTERVAL_S = int(os.getenv("REDIS_KEEPALIVE_INTERVAL_S", 10))
+REDIS_KEEPALIVE_COUNT = int(os.getenv("REDIS_KEEPALIVE_COUNT", 3))
+REDIS_HEALTH_CHECK_INTERVAL_S = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL_S", 30))
+
+# Startup gives up once REDIS_CONNECT_DEADLINE_S has passed instead of blocking indefinitely
+REDIS_CONNECT_DEADLINE_S = _env_float("REDIS_CONNECT_DEADLINE_S", 15.0)
+
+# Cluster mode. REDIS_CLUSTER_NODES is a comma separated list of host:port startup nodes.
+REDIS_CLUSTER = _env_bool("REDIS_CLUSTER", False)
+REDIS_CLUSTER_NODES = os.getenv("REDIS_CLUSTER_NODES") or f"{REDIS_HOST}:{REDIS_PORT}"
+
+
+def _keepalive_options() -> dict:
+    """
+    TCP keepalive tuning, limited to the options the platform supports.
+    """
+    options = {}
+    for name, value in (
+        ("TCP_KEEPIDLE", REDIS_KEEPALIVE_IDLE_S),
+        ("TCP_KEEPINTVL", REDIS_KEEPALIVE_INTERVAL_S),
+        ("TCP_KEEPCNT", REDIS_KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, name):
+            options[getattr(socket, name)] = value
+    return options
+
+
+def _connection_kwargs() -> dict:
+    kwargs = {
+        "socket_timeout": REDIS_SOCKET_TIMEOUT_S,
+        "socket_connect_timeout": REDIS_SOCKET_CONNECT_TIMEOUT_S,
+        "socket_keepalive": REDIS_SOCKET_KEEPALIVE,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL_S,
+    }
+    if REDIS_SOCKET_KEEPALIVE:
+        kwargs["socket_keepalive_options"] = _keepalive_options()
+    return kwargs
+
+
+def _cluster_startup_nodes():
+    nodes = []
+    for node in REDIS_CLUSTER_NODES.split(","):
+        host, _, port = node.strip().rpartition(":")
+        nodes.append(ClusterNode(host, int(port)))
+    return nodes
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """
+    A bounded, blocking connection pool that records how long callers wait for a connection.
+
+    Attributes:
+            checkouts (int): Number of connections handed out.
+            checkout_failures (int): Number of checkouts that timed out or failed to connect.
+            total_wait_s (float): Sum of the time spent waiting for a connection.
+            max_wait_s (float): Longest single wait for a connection.
+            max_in_use (int): High-water mark of simultaneously checked out connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self._checked_out = set()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.max_in_use = 0
+        super().__init__(*args, **kwargs)
+
+    def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except Exception:
+            with self._stats_lock:
+                self.checkout_failures += 1
+            raise
+
+        waited_s = time.perf_counter() - start
+        with self._stats_lock:
+            self._checked_out.add(id(connection))
+            self.checkouts += 1
+            self.total_wait_s += waited_s
+            self.max_wait_s = max(self.max_wait_s, waited_s)
+            self.max_in_use = max(self.max_in_use, len(self._checked_out))
+        return connection
+
+    def release(self, connection):
+        # The parent also releases connections that failed to connect, which were never counted
+        with self._stats_lock:
+            self._checked_out.discard(id(connection))
+        super().release(connection)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_connections": self.max_connections,
+                "created": len(self._connections),
+                "in_use": len(self._checked_out),
+                "max_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": (self.total_wait_s / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait_s * 1000,
+            }
 
 
 class RedisConnection:
     """
     A thread-safe Singleton class to manage the Redis client connection.
+
+    Connects to a single Redis server through bounded, instrumented connection pools, or to
+    a Redis Cluster when REDIS_CLUSTER is set. All settings come from the environment.
     """
 
     _instance = None
     _lock = threading.Lock()
     MAX_RETRIES = 5
-    INITIAL_DELAY = 1  # s
+    INITIAL_DELAY = 0.2  # s
+    MAX_DELAY = 3  # s
 
     def __new__(cls):
         """
@@ -27,38 +166,64 @@ class RedisConnection:
 
         # Singleton instance already exists
         if cls._instance is not None:
-            print("RedisConnectionPool already exists. Reusing instance...")
             return cls._instance
 
         # Singleton instance does not exist, attempt creation with lock.
         with cls._lock:
             if cls._instance is not None:
-                print("RedisConnectionPool already exists. Reusing instance...")
                 return cls._instance
 
             cls._instance = super(RedisConnection, cls).__new__(cls)
             cls._instance._client = None
+            cls._instance._raw_client = None
 
-            # print("RedisConnection Singleton created.")
             return cls._instance
 
-    @exponential_retry(max_attempts=MAX_RETRIES, initial_delay_s=INITIAL_DELAY)
+    @property
+    def is_cluster(self) -> bool:
+        return REDIS_CLUSTER
+
+    def _create_client(self, decode_responses: bool):
+        if REDIS_CLUSTER:
+            return RedisCluster(
+                startup_nodes=_cluster_startup_nodes(),
+                decode_responses=decode_responses,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                **_connection_kwargs(),
+            )
+
+        pool = InstrumentedConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            decode_responses=decode_responses,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT_S,
+            **_connection_kwargs(),
+        )
+        return redis.Redis(connection_pool=pool)
+
+    @RetryPolicy(
+        name="redis.connect",
+        max_attempts=MAX_RETRIES,
+        base_delay_s=INITIAL_DELAY,
+        max_delay_s=MAX_DELAY,
+        deadline_s=REDIS_CONNECT_DEADLINE_S,
+        retry_on=(redis.exceptions.ConnectionError, redis.exceptions.TimeoutError, OSError),
+    )
     def connect(self):
         """
         Idempotently attempts to establish a connection to the Redis server.
         """
 
-        # print(f"Attempting to connect to Redis at {REDIS_HOST}:{REDIS_PORT}.")
-
-        pool = redis.ConnectionPool(
-            host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True
-        )
-
-        client = redis.Redis(connection_pool=pool)
+        client = self._create_client(decode_responses=True)
 
         if client.ping():
-            print("Successfully pinged Redis.")
+            target = REDIS_CLUSTER_NODES if REDIS_CLUSTER else f"{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+            print(f"Successfully pinged Redis{' Cluster' if REDIS_CLUSTER else ''} at {target}.")
             self._client = client
+            # Binary payloads (see codecs.py) are read as raw bytes, so they get their own pool
+            self._raw_client = self._create_client(decode_responses=False)
             return True
         else:
             print("Failed to ping Redis.")
@@ -83,6 +248,42 @@ class RedisConnection:
 
         return self._client
 
+    def get_raw_client(self):
+        """
+        Returns a Redis client that does not decode responses, so values come back as bytes.
+        Connects if not already connected.
+        """
+        self.get_client()
+        return self._raw_client
+
+    def get_pool_stats(self) -> dict:
+        """
+        Returns connection pool metrics for the decoded and raw clients.
+
+        Standalone pools report checkout wait times and in-use counts. Cluster clients report
+        the in-use and idle connection counts of each node's pool.
+        """
+        stats = {}
+        for name, client in (("decoded", self._client), ("raw", self._raw_client)):
+            if client is None:
+                continue
+
+            if isinstance(client, RedisCluster):
+                nodes = {}
+                for node in client.get_nodes():
+                    if node.redis_connection is None:
+                        continue
+                    pool = node.redis_connection.connection_pool
+                    nodes[node.name] = {
+                        "max_connections": pool.max_connections,
+                        "in_use": len(pool._in_use_connections),
+                        "idle": len(pool._available_connections),
+                    }
+                stats[name] = {"nodes": nodes}
+            else:
+                stats[name] = client.connection_pool.stats()
+        return stats
+
     def ping(self) -> bool:
         """
         Pings the Redis server to check the health of the connection.
@@ -98,14 +299,20 @@ class RedisConnection:
 
     def close(self):
         """
-        Closes the Redis connection pool.
+        Closes the Redis connection pools.
         """
         if not self._client:
             print("No connection to close. Connect first!")
+            return
 
         print("Closing Redis connection...")
-        self._client.connection_pool.disconnect()
+        for client in (self._client, self._raw_client):
+            if isinstance(client, RedisCluster):
+                client.close()
+            elif client is not None:
+                client.connection_pool.disconnect()
         self._client = None
+        self._raw_client = None
 
 
 redis_connection = RedisConnection()
@@ -1,7 +1,10 @@
-import json
 import socket
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+from common.redis_client.ack_buffer import RedisAckBuffer, acknowledge_many
+from common.redis_client.claim_check import CLAIM_CHECK_FIELD, ClaimCheckPayload, RedisClaimCheckStore
+from common.redis_client.codecs import PAYLOAD_FIELD, CodecError, decode_fields, decode_payload
 from common.redis_client.connection import redis_connection
+from common.redis_client.keys import stream_key
 import os
 
 class RedisConsumer:
@@ -11,16 +14,29 @@ class RedisConsumer:
     Attributes:
             stream_name (str): The name of the Redis stream used as the queue.
             client: The connected redis-py client instance, managed by the RedisConnection singleton.
+                    Responses are raw bytes so payloads can be decoded by their codec.
             max_len (int): maximum number of messages in queue before a message is removed (allows for prioritisation of messages)
             group_name: name of group to listen to (like a bookmark)
             consumer_name: name given to redis when a message is consumed from stream.
+            ack_buffer: buffers acknowledgements when deferred acknowledgement is enabled, otherwise None.
     """
 
-    def __init__(self, stream_name: str, group_name: str, consumer_name:str):
+    def __init__(
+        self,
+        stream_name: str,
+        group_name: str,
+        consumer_name: str,
+        deferred_ack: bool = False,
+        ack_batch_size: int = 100,
+        ack_interval_s: float = 1.0,
+    ):
         """
         stream_name (str): The name of the Redis stream to listen to.
         group_name (str): The name of the Redis group to listen to.
         consumer_name (str): The name redis is told when a message is consumed.
+        deferred_ack (bool): If True, acknowledge() buffers IDs and flushes them in batches.
+        ack_batch_size (int): Number of buffered acknowledgements that triggers a flush.
+        ack_interval_s (float): Seconds after which buffered acknowledgements are flushed.
         """
 
         if not isinstance(stream_name, str) or not stream_name:
@@ -29,11 +45,17 @@ class RedisConsumer:
         if not isinstance(group_name, str) or not group_name:
             raise ValueError("Group name must be a non-empty string.")
 
-        self.stream_name = stream_name
+        self.stream_name = stream_key(stream_name)
         self.group_name = group_name
         self.consumer_name = consumer_name
         self.max_len = 100
-        self.client = redis_connection.get_client()
+        self.client = redis_connection.get_raw_client()
+        self.claim_checks = RedisClaimCheckStore(self.client)
+        self.ack_buffer = (
+            RedisAckBuffer(self.client, group_name, ack_batch_size, ack_interval_s)
+            if deferred_ack
+            else None
+        )
 
         print(
             f"Redis consumer initialised and listening to {stream_name}, group {group_name} under the name {consumer_name}"
@@ -62,13 +84,21 @@ class RedisConsumer:
                 raise
 
     def __decode_one_message(self, stream_name, redis_message_id, fields):
-        decoded_fields = fields 
-
-        if 'payload' in decoded_fields:
-            message_data = json.loads(decoded_fields['payload'])
+        stream_name = stream_name.decode("utf-8")
+        redis_message_id = redis_message_id.decode("utf-8")
+        decoded_fields = decode_fields(fields)
+
+        if CLAIM_CHECK_FIELD in decoded_fields:
+            # Body stays in Redis until something reads beyond the inline header
+            message_data = ClaimCheckPayload(self.claim_checks, decoded_fields)
+        elif PAYLOAD_FIELD in decoded_fields:
+            message_data = decode_payload(decoded_fields)
         else:
             print(f"Warning: Message {redis_message_id} is missing 'payload' field.")
-            message_data = decoded_fields
+            message_data = {
+                key: value.decode("utf-8", errors="replace")
+                for key, value in decoded_fields.items()
+            }
 
         message_dict = {
             'stream': stream_name,
@@ -86,14 +116,8 @@ class RedisConsumer:
                 A dictionary like {'redis_message_id': '...', 'payload': {...}},
                 or None if the operation timed out.
         """
-        try:            
-            response = self.client.xreadgroup(
-                self.group_name,
-                self.consumer_name,
-                {self.stream_name: ">"},
-                count=1,
-                block=block,
-            )
+        try:
+            response = self._read({self.stream_name: ">"}, 1, block)
 
             if not response:
                 None
@@ -103,9 +127,9 @@ class RedisConsumer:
 
             return self.__decode_one_message(stream_name, redis_message_id, fields)
             
-        except json.JSONDecodeError as e:
+        except CodecError as e:
             print(
-                f"CORRUPTED MESSAGE: Failed to decode JSON from stream '{self.stream_name}'. Error: {e}"
+                f"CORRUPTED MESSAGE: Failed to decode payload from stream '{self.stream_name}'. Error: {e}"
             )
             raise
 
@@ -125,14 +149,7 @@ class RedisConsumer:
         """
         try:
             all_messages = []
-            
-            response = self.client.xreadgroup(
-                self.group_name,
-                self.consumer_name,
-                {self.stream_name: ">"},
-                count=num_to_consume,
-                block=block,
-            )
+            response = self._read({self.stream_name: ">"}, num_to_consume, block)
 
             if not response:
                 return all_messages
@@ -142,9 +159,9 @@ class RedisConsumer:
                     try:
                         message_dict = self.__decode_one_message(stream_name, redis_message_id, fields)
                         all_messages.append(message_dict)
-                    except json.JSONDecodeError as e:
-                        msg_id_str = redis_message_id
-                        print(f"CORRUPTED MESSAGE: Skipping message {msg_id_str} due to JSON decode error: {e}")
+                    except CodecError as e:
+                        msg_id_str = redis_message_id.decode("utf-8")
+                        print(f"CORRUPTED MESSAGE: Skipping message {msg_id_str} due to decode error: {e}")
                         continue
 
             return all_messages
@@ -153,10 +170,30 @@ class RedisConsumer:
             print(f"Error consuming from stream '{self.stream_name}': {e}")
             raise
 
+    def _read(self, streams_dict: Dict[str, str], count: int, block: Optional[int]):
+        """
+        XREADGROUP on the given streams. In deferred mode buffered acknowledgements are
+        flushed when due, including while the read waits for messages.
+        """
+        def read(block_ms: Optional[int]):
+            return self.client.xreadgroup(
+                self.group_name, self.consumer_name, streams_dict, count=count, block=block_ms
+            )
+
+        if self.ack_buffer is None:
+            return read(block)
+        return self.ack_buffer.read_with_flush(read, block)
+
     def acknowledge(self, redis_message_id: str):
         """
         Acknowledges that a message from a specific stream has been processed.
+
+        In deferred mode the ID is buffered and acknowledged with the next flush.
         """
+        if self.ack_buffer is not None:
+            self.ack_buffer.add(self.stream_name, redis_message_id)
+            return
+
         try:
             result = self.client.xack(self.stream_name, self.group_name, redis_message_id)
             if result == 0:
@@ -164,3 +201,29 @@ class RedisConsumer:
         except Exception as e:
             print(f"Error acknowledging message {redis_message_id} on stream {self.stream_name}: {e}")
             raise
+
+    def acknowledge_many(self, redis_message_ids: List[str]) -> int:
+        """
+        Acknowledges many processed messages with a single XACK round trip.
+
+        Returns:
+                int: The number of messages Redis reported as acknowledged.
+        """
+        try:
+            return acknowledge_many(
+                self.client, self.group_name, {self.stream_name: list(redis_message_ids)}
+            )
+        except Exception as e:
+            print(f"Error acknowledging {len(redis_message_ids)} messages on stream {self.stream_name}: {e}")
+            raise
+
+    def flush_acknowledgements(self) -> int:
+        """
+        Flushes any buffered acknowledgements. Call before shutting down in deferred mode.
+
+        Returns:
+                int: The number of messages Redis reported as acknowledged.
+        """
+        if self.ack_buffer is None:
+            return 0
+        return self.ack_buffer.flush()
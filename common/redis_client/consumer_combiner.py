@@ -1,9 +1,12 @@
 import os
 import socket
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import redis
+from common.redis_client.ack_buffer import RedisAckBuffer, acknowledge_many
+from common.redis_client.claim_check import CLAIM_CHECK_FIELD, ClaimCheckPayload, RedisClaimCheckStore
+from common.redis_client.codecs import PAYLOAD_FIELD, CodecError, decode_fields, decode_payload
 from common.redis_client.connection import redis_connection
-import json
+from common.redis_client.keys import stream_key
 
 class RedisConsumerCombiner:
     """
@@ -14,24 +17,44 @@ class RedisConsumerCombiner:
     from whichever stream has them available first.
     """
 
-    def __init__(self, streams: List[str], group_name: str, consumer_name:str):
+    def __init__(
+        self,
+        streams: List[str],
+        group_name: str,
+        consumer_name: str,
+        deferred_ack: bool = False,
+        ack_batch_size: int = 100,
+        ack_interval_s: float = 1.0,
+    ):
         """
         Initializes the RedisConsumerCombiner.
 
         Args:
             streams (List[str]): A list of stream names to listen to.
             group_name (str): The single group name this consumer will use across all streams.
+            consumer_name (str): The name redis is told when a message is consumed.
+            deferred_ack (bool): If True, acknowledge() buffers IDs and flushes them in batches.
+            ack_batch_size (int): Number of buffered acknowledgements that triggers a flush.
+            ack_interval_s (float): Seconds after which buffered acknowledgements are flushed.
         """
         if not isinstance(streams, list) or not streams:
             raise ValueError("streams must be a non-empty list.")
         if not isinstance(group_name, str) or not group_name:
             raise ValueError("group_name must be a non-empty string.")
 
-        self.streams = streams
+        # Streams share a hash tag so one XREADGROUP can cover all of them in cluster mode
+        self.streams = [stream_key(stream) for stream in streams]
         self.group_name = group_name
         self.consumer_name = consumer_name
         
-        self.client = redis_connection.get_client()
+        # Raw bytes so payloads can be decoded by the codec they were tagged with
+        self.client = redis_connection.get_raw_client()
+        self.claim_checks = RedisClaimCheckStore(self.client)
+        self.ack_buffer = (
+            RedisAckBuffer(self.client, group_name, ack_batch_size, ack_interval_s)
+            if deferred_ack
+            else None
+        )
 
         print("--- Initializing RedisConsumerCombiner ---")
         print(f"  - Group: '{self.group_name}', Consumer: '{self.consumer_name}'")
@@ -58,15 +81,23 @@ class RedisConsumerCombiner:
                 
     def __decode_one_message(self, stream_name, redis_message_id, fields):
         """
-        Decodes a single raw message from Redis, handling byte conversion and JSON parsing.
+        Decodes a single raw message from Redis, handling byte conversion and payload decoding.
         """
-        decoded_fields = fields 
+        stream_name = stream_name.decode("utf-8")
+        redis_message_id = redis_message_id.decode("utf-8")
+        decoded_fields = decode_fields(fields)
 
-        if 'payload' in decoded_fields:
-            message_data = json.loads(decoded_fields['payload'])
+        if CLAIM_CHECK_FIELD in decoded_fields:
+            # Body stays in Redis until something reads beyond the inline header
+            message_data = ClaimCheckPayload(self.claim_checks, decoded_fields)
+        elif PAYLOAD_FIELD in decoded_fields:
+            message_data = decode_payload(decoded_fields)
         else:
             print(f"Warning: Message {redis_message_id} is missing 'payload' field.")
-            message_data = decoded_fields
+            message_data = {
+                key: value.decode("utf-8", errors="replace")
+                for key, value in decoded_fields.items()
+            }
 
         message_dict = {
             'stream': stream_name,
@@ -89,14 +120,7 @@ class RedisConsumerCombiner:
         """
         try:
             streams_dict = {stream: ">" for stream in self.streams}
-            
-            response = self.client.xreadgroup(
-                self.group_name,
-                self.consumer_name,
-                streams=streams_dict,
-                count=1,
-                block=block,
-            )
+            response = self._read(streams_dict, 1, block)
 
             if not response:
                 return None
@@ -111,13 +135,18 @@ class RedisConsumerCombiner:
             print(f"An error occurred in RedisConsumerCombiner.consume_one: {e}")
             return None
         
-    def consume_many(self, num_to_consume: int = 1, block: int = 0) -> List[Dict[str, Any]]:
+    def consume_many(self, num_to_consume: int = 1, block: int = 0, raise_errors: bool = False) -> List[Dict[str, Any]]:
         """
         Waits for and consumes up to N messages from ANY of the configured streams.
 
+        Messages that cannot be decoded are acknowledged and skipped, so they don't stay
+        pending forever.
+
         Args:
             num_to_consume: The maximum number of messages to consume from each stream.
             block: Time in milliseconds to wait before timing out.
+            raise_errors: If True, Redis errors are raised instead of returning an empty list,
+                so callers can tell a failed read from an empty one.
 
         Returns:
             A list of decoded message dictionaries, or an empty list on timeout.
@@ -125,14 +154,7 @@ class RedisConsumerCombiner:
         all_messages = []
         try:
             streams_dict = {stream: ">" for stream in self.streams}
-
-            response = self.client.xreadgroup(
-                self.group_name,
-                self.consumer_name,
-                streams=streams_dict,
-                count=num_to_consume,
-                block=block,
-            )
+            response = self._read(streams_dict, num_to_consume, block)
 
             if not response:
                 return all_messages
@@ -143,19 +165,112 @@ class RedisConsumerCombiner:
                     try:
                         message_dict = self.__decode_one_message(stream_name, redis_message_id, fields)
                         all_messages.append(message_dict)
-                    except json.JSONDecodeError as e:
-                        print(f"CORRUPTED MESSAGE: Skipping message {redis_message_id} from stream '{stream_name}' due to JSON decode error: {e}")
-                        continue
+                    except CodecError as e:
+                        print(f"CORRUPTED MESSAGE: Skipping message {redis_message_id} from stream '{stream_name}' due to decode error: {e}")
+                        self._drop(stream_name, redis_message_id)
             return all_messages
         
         except Exception as e:
             print(f"An error occurred in RedisConsumerCombiner.consume_many: {e}")
+            if raise_errors:
+                raise
             return all_messages
 
+    def consume_pending(self, num_to_consume: int = 100, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """
+        Returns up to N messages this consumer has already read but not acknowledged,
+        e.g. after a crash between reading and acknowledging. Never blocks.
+
+        Consumers that only acknowledge after their side effects are durable call this on
+        startup, before consume_many, so nothing read before a restart is lost.
+
+        Trimmed and undecodable entries are acknowledged instead of returned, so an empty
+        list does not mean nothing is pending; keep calling until has_pending() is False.
+
+        Args:
+            num_to_consume: The maximum number of pending messages to return from each stream.
+            raise_errors: If True, Redis errors are raised instead of returning an empty list.
+
+        Returns:
+            A list of decoded message dictionaries, or an empty list if nothing is pending.
+        """
+        all_messages = []
+        try:
+            streams_dict = {stream: "0" for stream in self.streams}
+            response = self.client.xreadgroup(
+                self.group_name,
+                self.consumer_name,
+                streams=streams_dict,
+                count=num_to_consume,
+            )
+
+            for stream_name, messages in response or []:
+                for redis_message_id, fields in messages:
+                    # Entries trimmed from the stream since they were read come back without fields
+                    if not fields:
+                        print(f"Warning: Pending message {redis_message_id} was trimmed from stream '{stream_name}'. Acknowledging it.")
+                        self._drop(stream_name, redis_message_id)
+                        continue
+                    try:
+                        all_messages.append(self.__decode_one_message(stream_name, redis_message_id, fields))
+                    except CodecError as e:
+                        # Acknowledged so it isn't returned by every later call
+                        print(f"CORRUPTED MESSAGE: Dropping pending message {redis_message_id} from stream '{stream_name}' due to decode error: {e}")
+                        self._drop(stream_name, redis_message_id)
+            return all_messages
+
+        except Exception as e:
+            print(f"An error occurred in RedisConsumerCombiner.consume_pending: {e}")
+            if raise_errors:
+                raise
+            return all_messages
+
+    def has_pending(self) -> bool:
+        """
+        True if this consumer still has read but unacknowledged messages on any stream.
+        """
+        for stream in self.streams:
+            if self.client.xpending_range(
+                stream, self.group_name, min="-", max="+", count=1, consumername=self.consumer_name
+            ):
+                return True
+        return False
+
+    def _drop(self, stream_name: bytes, redis_message_id: bytes):
+        """
+        Acknowledges an entry that can never be processed (trimmed or undecodable). A failed
+        acknowledgement is only logged: the entry stays pending and is dropped on a later read,
+        while the rest of the batch is still returned.
+        """
+        try:
+            self.acknowledge(stream_name.decode("utf-8"), redis_message_id.decode("utf-8"))
+        except Exception:
+            pass
+
+    def _read(self, streams_dict: Dict[str, str], count: int, block: Optional[int]):
+        """
+        XREADGROUP on the given streams. In deferred mode buffered acknowledgements are
+        flushed when due, including while the read waits for messages.
+        """
+        def read(block_ms: Optional[int]):
+            return self.client.xreadgroup(
+                self.group_name, self.consumer_name, streams_dict, count=count, block=block_ms
+            )
+
+        if self.ack_buffer is None:
+            return read(block)
+        return self.ack_buffer.read_with_flush(read, block)
+
     def acknowledge(self, stream_name: str, redis_message_id: str):
         """
         Acknowledges that a message from a specific stream has been processed.
+
+        In deferred mode the ID is buffered and acknowledged with the next flush.
         """
+        if self.ack_buffer is not None:
+            self.ack_buffer.add(stream_name, redis_message_id)
+            return
+
         try:
             result = self.client.xack(stream_name, self.group_name, redis_message_id)
             if result == 0:
@@ -163,3 +278,35 @@ class RedisConsumerCombiner:
         except Exception as e:
             print(f"Error acknowledging message {redis_message_id} on stream {stream_name}: {e}")
             raise
+
+    def acknowledge_many(self, acks: Iterable[Tuple[str, str]]) -> int:
+        """
+        Acknowledges many processed messages, across any of the configured streams,
+        in a single pipelined round trip.
+
+        Args:
+            acks: (stream_name, redis_message_id) pairs to acknowledge.
+
+        Returns:
+            The number of messages Redis reported as acknowledged.
+        """
+        ids_by_stream: Dict[str, List[str]] = {}
+        for stream_name, redis_message_id in acks:
+            ids_by_stream.setdefault(stream_name, []).append(redis_message_id)
+
+        try:
+            return acknowledge_many(self.client, self.group_name, ids_by_stream)
+        except Exception as e:
+            print(f"Error acknowledging messages on streams {list(ids_by_stream)}: {e}")
+            raise
+
+    def flush_acknowledgements(self) -> int:
+        """
+        Flushes any buffered acknowledgements. Call before shutting down in deferred mode.
+
+        Returns:
+            The number of messages Redis reported as acknowledged.
+        """
+        if self.ack_buffer is None:
+            return 0
+        return self.ack_buffer.flush()
@@ -1,4 +1,6 @@
 from common.redis_client.connection import redis_connection
+from common.redis_client.keys import dedup_key
+from common.requests.batches import bounded_batch_action
 
 
 class RedisDuplicateFilter:
@@ -21,7 +23,7 @@ class RedisDuplicateFilter:
         if not isinstance(key_name, str) or not key_name:
             raise ValueError("Set name must be a non-empty string.")
 
-        self.key_name = key_name
+        self.key_name = dedup_key(key_name)
         self.ttl_seconds = ttl_seconds
         self.client = redis_connection.get_client()
 
@@ -76,6 +78,38 @@ class RedisDuplicateFilter:
             )
             raise
 
+    def has_many_in_batches(
+        self, items: list[str], batch_size: int = 1000, max_in_flight: int = 4
+    ) -> list[str]:
+        """
+        Like has_many, but splits large inputs into SMISMEMBER batches that run concurrently
+        over the connection pool, so no single command blocks Redis for long.
+
+        Args:
+                items (list[str]): A list of strings to check.
+                batch_size (int): Items per SMISMEMBER call.
+                max_in_flight (int): Maximum number of concurrent batches.
+
+        Returns:
+                list[str]: The items that were NOT FOUND in the Redis set, in no particular order.
+        """
+
+        if not items:
+            print("no items to check")
+            raise Exception("No items to check")
+
+        new_items = []
+        for batch in bounded_batch_action(
+            items,
+            batch_size,
+            lambda batch: self.has_many(batch.items),
+            max_in_flight=max_in_flight,
+        ):
+            if not batch.succeeded:
+                raise batch.error
+            new_items.extend(batch.result)
+        return new_items
+
     def add_one(self, item: str):
         """
         Attempts to atomically add a string to the set.
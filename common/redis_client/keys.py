@@ -0,0 +1,38 @@
+import os
+
+from common.redis_client.connection import REDIS_CLUSTER
+
+"""
+Key naming for Redis Cluster
+
+Redis Cluster only runs a multi-key command when every key hashes to the same slot.
+XREADGROUP over several streams (RedisConsumerCombiner) is such a command, so all
+streams share one hash tag:
+
+        ingestor:to.be.scraped      ->  {streams}:ingestor:to.be.scraped
+        ingestor:seen.articles      ->  {dedup}:ingestor:seen.articles
+
+Claim-check keys are content addressed and deliberately untagged so they spread across
+the cluster. Outside cluster mode names are used unchanged, so existing keys keep working.
+"""
+
+STREAMS_HASH_TAG = os.getenv("REDIS_STREAMS_HASH_TAG", "streams")
+DEDUP_HASH_TAG = os.getenv("REDIS_DEDUP_HASH_TAG", "dedup")
+
+
+def hash_tagged(name: str, tag: str) -> str:
+    """
+    Prefixes a key with a {hash tag} when running against Redis Cluster.
+    Names that already contain a hash tag are returned unchanged.
+    """
+    if not REDIS_CLUSTER or "{" in name:
+        return name
+    return f"{{{tag}}}:{name}"
+
+
+def stream_key(name: str) -> str:
+    return hash_tagged(name, STREAMS_HASH_TAG)
+
+
+def dedup_key(name: str) -> str:
+    return hash_tagged(name, DEDUP_HASH_TAG)
@@ -1,7 +1,15 @@
-import json
 from typing import Any, Dict, List, Optional
 
+from common.redis_client.claim_check import (
+    CLAIM_CHECK_FIELD,
+    CLAIM_CHECK_THRESHOLD_BYTES,
+    HEADER_FIELD,
+    ClaimCheckPayload,
+    RedisClaimCheckStore,
+)
+from common.redis_client.codecs import CODEC_FIELD, DEFAULT_CODEC, PAYLOAD_FIELD, encode_fields, get_codec
 from common.redis_client.connection import redis_connection
+from common.redis_client.keys import stream_key
 
 
 class RedisPublisher:
@@ -13,27 +21,71 @@ class RedisPublisher:
             client: The connected redis-py client instance, managed by the
                     RedisConnection singleton.
             max_len (int): maximum number of messages in queue before a message is removed (allows for prioritisation of messages)
+            codec (StreamCodec): encodes each message into the stream's payload field.
+            offload_threshold_bytes (int): encoded payloads larger than this are moved to a claim-check key
+                    and only referenced from the stream. None disables offloading.
+            claim_checks (RedisClaimCheckStore): where offloaded payloads are stored.
     """
 
-    def __init__(self, stream_name: str):
+    def __init__(
+        self,
+        stream_name: str,
+        codec: Optional[str] = None,
+        offload_threshold_bytes: Optional[int] = CLAIM_CHECK_THRESHOLD_BYTES,
+    ):
         """
         Args:
         stream_name (str): The name of the Redis stream to publish to.
+        codec (str): Name of the payload codec, e.g. "json" or "msgpack". Defaults to REDIS_STREAM_CODEC.
+        offload_threshold_bytes (int): Payload size above which the body is offloaded. Defaults to CLAIM_CHECK_THRESHOLD_BYTES.
         """
 
         if not isinstance(stream_name, str) or not stream_name:
             raise ValueError("Stream name must be a non-empty string.")
 
-        self.stream_name = stream_name
+        self.stream_name = stream_key(stream_name)
         self.max_len = 100000
-        self.client = redis_connection.get_client()
+        self.codec = get_codec(codec or DEFAULT_CODEC)
+        self.client = redis_connection.get_raw_client()
+        self.offload_threshold_bytes = offload_threshold_bytes
+        self.claim_checks = RedisClaimCheckStore(self.client)
 
-        print(f"Redis publisher initialised and publishing to {stream_name}")
+        print(f"Redis publisher initialised and publishing to {stream_name} ({self.codec.name})")
+
+    def _queue_message(self, pipe, message: Dict[str, Any]) -> int:
+        """
+        Queues the commands that publish one message on a pipeline.
+
+        Large payloads are written to a claim-check key in the same pipeline and the stream
+        entry only carries the reference. Messages that are already claim-checked are forwarded
+        by reference without fetching their body.
+
+        Returns:
+                int: The position of the XADD result in the pipeline's results.
+        """
+        if isinstance(message, ClaimCheckPayload):
+            self.claim_checks.touch(message.reference, pipe)
+            fields = message.to_fields()
+        else:
+            fields = encode_fields(message, self.codec)
+            payload = fields[PAYLOAD_FIELD]
+
+            if self.offload_threshold_bytes is not None and len(payload) > self.offload_threshold_bytes:
+                fields = {
+                    CODEC_FIELD: self.codec.name,
+                    CLAIM_CHECK_FIELD: self.claim_checks.put(payload, pipe),
+                }
+                if HEADER_FIELD in message:
+                    fields[HEADER_FIELD] = self.codec.encode(message[HEADER_FIELD])
+
+        xadd_index = len(pipe)
+        pipe.xadd(self.stream_name, fields, maxlen=self.max_len, approximate=True)
+        return xadd_index
 
 
     def publish_one(self, message: Dict[str, Any]):
         """
-        Serializes a dictionary to JSON and adds it to the stream.
+        Serializes a dictionary with the publisher's codec and adds it to the stream.
 
         Args:
                 message: a message object that has been deserialised into a dictionary, that is waiting to be published
@@ -43,14 +95,13 @@ class RedisPublisher:
         """
 
         try:
-            if not message or message == {}:
+            if not isinstance(message, ClaimCheckPayload) and (not message or message == {}):
                 print("No message to publish")
                 raise Exception("No message to publish")
 
-            payload = {"payload": json.dumps(message)}
-            redis_message_id = self.client.xadd(
-                self.stream_name, payload, maxlen=self.max_len, approximate=True
-            )
+            pipe = self.client.pipeline(transaction=False)
+            xadd_index = self._queue_message(pipe, message)
+            redis_message_id = pipe.execute()[xadd_index].decode("utf-8")
             # print(
             #     f"Published message {message.header.message_id} to {self.stream_name}. [ REDIS_MESSAGE_ID: {redis_message_id} ]"
             # )
@@ -71,7 +122,7 @@ class RedisPublisher:
 
     def publish_many(self, messages: List[Dict[str, Any]]) -> Optional[List[str]]:
         """
-        Serializes messages dictionaries to JSON and adds all to the stream.
+        Serializes messages dictionaries with the publisher's codec and adds all to the stream.
 
         Args:
                 messages: A list of JSON-serializable dictionaries, where each
@@ -86,21 +137,20 @@ class RedisPublisher:
                 print("No messages to publish")
                 raise Exception("No messages to publish")
 
-            pipe = self.client.pipeline()
+            pipe = self.client.pipeline(transaction=False)
 
-            for message_data in messages:
-                payload = {"payload": json.dumps(message_data)}
-                pipe.xadd(
-                    self.stream_name, payload, maxlen=self.max_len, approximate=True
-                )
+            xadd_indexes = [
+                self._queue_message(pipe, message_data) for message_data in messages
+            ]
 
-            redis_message_ids = pipe.execute()
+            results = pipe.execute()
+            redis_message_ids = [results[i].decode("utf-8") for i in xadd_indexes]
 
             print(f"Published {len(redis_message_ids)} messages to {self.stream_name}.")
             return redis_message_ids
 
         except TypeError as e:
-            # This specific error is for when json.dumps fails.
+            # This specific error is for when the codec fails to encode a message.
             print(
                 f"Serialization failed for a message in the batch for stream "
                 f"'{self.stream_name}'. No messages were published. Error: {e}"
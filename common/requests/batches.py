@@ -1,4 +1,6 @@
 import concurrent.futures
+import itertools
+import time
 
 
 class Batch:
@@ -13,10 +15,23 @@ class Batch:
         self.completed = False
         self.result = None
 
+        # Filled in by bounded_batch_action
+        self.error = None
+        self.started_at = None
+        self.duration_s = None
+
     def set_completed(self, result):
         self.completed = True
         self.result = result
 
+    def set_failed(self, error):
+        self.completed = True
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.completed and self.error is None
+
 
 def split_into_batches(items, batch_size):
     for i in range(0, len(items), batch_size):
@@ -33,9 +48,154 @@ def batch_action(items, batch_size, action):
 # wrapper
 # action must take a batch as sole argument. other args can be filled in at defintion time.
 # action mus return a completed Batch?
+# Results come back in submission order. Prefer bounded_batch_action for large inputs.
 def multithreaded_batch_action(items, batch_size, action):
     with concurrent.futures.ThreadPoolExecutor() as executor:
         batches_to_execute = executor.map(action, split_into_batches(items, batch_size))
 
         for output_batch in batches_to_execute:
             yield output_batch
+
+
+def _timed_action(action, batch):
+    """
+    Runs an action on a batch and records its timing and any failure on the batch.
+    Module level so it can be sent to a process pool.
+    """
+    batch.started_at = time.time()
+    start = time.perf_counter()
+    try:
+        output = action(batch)
+        if isinstance(output, Batch):
+            batch = output
+        else:
+            batch.set_completed(output)
+    except Exception as e:
+        batch.set_failed(e)
+    batch.duration_s = time.perf_counter() - start
+    return batch
+
+
+class AdaptiveBatchSize:
+    """
+    Adjusts the batch size towards a target latency per batch.
+
+    Batches that finish well under the target grow the size, batches over the target shrink it
+    (multiplicatively, so an overloaded backend is relieved quickly).
+    """
+
+    def __init__(
+        self,
+        initial_size,
+        target_latency_s,
+        min_size=1,
+        max_size=None,
+        increase_factor=1.25,
+        decrease_factor=0.5,
+    ):
+        self.size = initial_size
+        self.target_latency_s = target_latency_s
+        self.min_size = min_size
+        self.max_size = max_size or initial_size * 16
+        self.increase_factor = increase_factor
+        self.decrease_factor = decrease_factor
+
+    def observe(self, batch):
+        if batch.duration_s is None:
+            return
+
+        if not batch.succeeded or batch.duration_s > self.target_latency_s:
+            new_size = self.size * self.decrease_factor
+        elif batch.duration_s < self.target_latency_s * 0.8 and batch.size >= self.size:
+            # Only grow on full-sized batches, the last partial batch says nothing about capacity
+            new_size = self.size * self.increase_factor
+        else:
+            return
+
+        self.size = max(self.min_size, min(self.max_size, int(new_size) or 1))
+
+
+def bounded_batch_action(
+    items,
+    batch_size,
+    action,
+    max_in_flight=4,
+    use_processes=False,
+    max_workers=None,
+    target_latency_s=None,
+    min_batch_size=1,
+    max_batch_size=None,
+):
+    """
+    Runs `action` over batches of `items` concurrently and yields each Batch as soon as it
+    completes, in completion order.
+
+    At most `max_in_flight` batches are submitted at a time, and items are pulled from the
+    (possibly lazy) iterable only as batches are submitted, so memory stays bounded.
+    Each yielded Batch carries `started_at`, `duration_s`, and `error` if the action raised
+    (failures are reported on the batch rather than stopping the run).
+
+    Args:
+        items: Any iterable of items.
+        batch_size: Items per batch (the initial size when adapting).
+        action: Takes a Batch and returns a completed Batch or a result for it.
+                Must be picklable when use_processes is True.
+        max_in_flight: Maximum number of batches submitted but not yet yielded.
+        use_processes: Use a process pool for CPU-bound actions instead of threads.
+        max_workers: Pool size. Defaults to max_in_flight.
+        target_latency_s: If set, batch size adapts so batches take about this long.
+        min_batch_size, max_batch_size: Bounds for the adaptive batch size.
+    """
+    if batch_size < 1 or max_in_flight < 1:
+        raise ValueError("batch_size and max_in_flight must be at least 1.")
+
+    sizer = (
+        AdaptiveBatchSize(batch_size, target_latency_s, min_batch_size, max_batch_size)
+        if target_latency_s
+        else None
+    )
+    executor_class = (
+        concurrent.futures.ProcessPoolExecutor
+        if use_processes
+        else concurrent.futures.ThreadPoolExecutor
+    )
+
+    source = iter(items)
+    offset = 0
+    exhausted = False
+    in_flight = {}
+
+    with executor_class(max_workers=max_workers or max_in_flight) as executor:
+        try:
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    size = sizer.size if sizer else batch_size
+                    chunk = list(itertools.islice(source, size))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    batch = Batch(offset, chunk)
+                    offset += len(chunk)
+                    in_flight[executor.submit(_timed_action, action, batch)] = batch
+
+                if not in_flight:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    batch = in_flight.pop(future)
+                    try:
+                        output_batch = future.result()
+                    except Exception as e:
+                        # e.g. the action or batch could not be pickled for a process pool
+                        batch.set_failed(e)
+                        output_batch = batch
+
+                    if sizer:
+                        sizer.observe(output_batch)
+                    yield output_batch
+        finally:
+            for future in in_flight:
+                future.cancel()
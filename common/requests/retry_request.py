@@ -1,30 +1,258 @@
+import asyncio
+import functools
+import inspect
+import logging
+import threading
 import time
-from math import exp
 from random import uniform
+from typing import Any, Callable, Dict, Optional, Tuple, Type
 
+logger = logging.getLogger(__name__)
 
-# make this a function wrapper
-# something like this idk
-def retry(max_attempts=3, delay_s=1):
-    def decorator_retry(func):
+
+class RetryBudget:
+    """
+    A token bucket shared by every caller of a dependency, capping retries to a fraction
+    of normal traffic.
+
+    Each first attempt deposits `retry_ratio` tokens and each retry spends one, so during
+    an outage retries stop once the bucket is empty instead of multiplying the load.
+    `min_retries_per_s` keeps a trickle of retries available when traffic is low.
+
+    Attributes:
+            retry_ratio (float): Tokens deposited per first attempt (0.2 allows ~20% extra load).
+            min_retries_per_s (float): Tokens refilled per second regardless of traffic.
+            max_tokens (float): Bucket capacity.
+    """
+
+    def __init__(self, retry_ratio: float = 0.2, min_retries_per_s: float = 1.0, max_tokens: float = 10.0):
+        self.retry_ratio = retry_ratio
+        self.min_retries_per_s = min_retries_per_s
+        self.max_tokens = max_tokens
+
+        self._tokens = max_tokens
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last_refill) * self.min_retries_per_s)
+        self._last_refill = now
+
+    def record_attempt(self):
+        """
+        Called for every first attempt. Deposits `retry_ratio` tokens.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.retry_ratio)
+
+    def try_spend(self) -> bool:
+        """
+        Withdraws one token for a retry. Returns False when the budget is exhausted.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class RetryStats:
+    """
+    Thread-safe counters describing how a RetryPolicy has behaved.
+    """
+
+    FIELDS = ("calls", "attempts", "retries", "successes", "give_ups", "budget_exhausted", "deadline_exceeded")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {field: 0 for field in self.FIELDS}
+
+    def incr(self, field: str):
+        with self._lock:
+            self._counts[field] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+_policies: Dict[str, "RetryPolicy"] = {}
+
+
+def get_retry_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Returns the counters of every named RetryPolicy.
+    """
+    return {name: policy.stats.snapshot() for name, policy in _policies.items()}
+
+
+class RetryPolicy:
+    """
+    Retries sync or async callables with decorrelated jitter, an overall deadline and an
+    optional shared RetryBudget.
+
+    Delays follow decorrelated jitter: each sleep is drawn from [base_delay_s, 3 * previous sleep]
+    and capped at max_delay_s. A retry is abandoned when the exception is not retry-able, when the
+    attempts run out, when the next sleep would cross the deadline, or when the budget is empty.
+    The last exception is re-raised unchanged on give-up.
+
+    Can be used as a decorator:
+
+        @RetryPolicy(name="redis.connect", max_attempts=5, deadline_s=10)
+        def connect(): ...
+
+    Attributes:
+            name (str): Identifies the policy in get_retry_stats(). Unnamed policies are not registered.
+            max_attempts (int): Total attempts including the first one.
+            base_delay_s (float): Smallest sleep between attempts.
+            max_delay_s (float): Largest sleep between attempts.
+            deadline_s (float): Overall time limit across all attempts and sleeps. None for no limit.
+            retry_on (Tuple[Type[BaseException]]): Exception classes that are worth retrying.
+            budget (RetryBudget): Shared budget that retries draw from. None for no budget.
+            stats (RetryStats): Attempt, retry and give-up counters.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        max_attempts: int = 3,
+        base_delay_s: float = 0.1,
+        max_delay_s: float = 10.0,
+        deadline_s: Optional[float] = None,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        budget: Optional[RetryBudget] = None,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        if base_delay_s < 0 or max_delay_s < base_delay_s:
+            raise ValueError("Delays must satisfy 0 <= base_delay_s <= max_delay_s.")
+
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.deadline_s = deadline_s
+        self.retry_on = retry_on
+        self.budget = budget
+        self.stats = RetryStats()
+
+        if name:
+            _policies[name] = self
+
+    def next_delay(self, previous_delay_s: float) -> float:
+        """
+        Decorrelated jitter: uniform between the base delay and three times the previous delay.
+        """
+        upper = max(self.base_delay_s, previous_delay_s * 3)
+        return min(self.max_delay_s, uniform(self.base_delay_s, upper))
+
+    def _should_retry(self, error: BaseException, attempt: int, started: float, delay_s: float) -> bool:
+        """
+        Decides whether to sleep `delay_s` and try again after `attempt` failed with `error`.
+        """
+        label = self.name or "retry"
+
+        if not isinstance(error, self.retry_on):
+            self.stats.incr("give_ups")
+            return False
+
+        if attempt >= self.max_attempts:
+            self.stats.incr("give_ups")
+            logger.warning("%s: giving up after %d attempts: %s", label, attempt, error)
+            return False
+
+        if self.deadline_s is not None and time.monotonic() - started + delay_s >= self.deadline_s:
+            self.stats.incr("give_ups")
+            self.stats.incr("deadline_exceeded")
+            logger.warning("%s: giving up, %.1fs deadline reached after %d attempts: %s", label, self.deadline_s, attempt, error)
+            return False
+
+        if self.budget is not None and not self.budget.try_spend():
+            self.stats.incr("give_ups")
+            self.stats.incr("budget_exhausted")
+            logger.warning("%s: giving up, retry budget exhausted: %s", label, error)
+            return False
+
+        self.stats.incr("retries")
+        logger.debug("%s: attempt %d failed (%s), retrying in %.2fs", label, attempt, error, delay_s)
+        return True
+
+    def _start_call(self) -> float:
+        self.stats.incr("calls")
+        if self.budget is not None:
+            self.budget.record_attempt()
+        return time.monotonic()
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Calls a synchronous function, retrying according to this policy.
+        """
+        started = self._start_call()
+        delay_s = self.base_delay_s
+
+        for attempt in range(1, self.max_attempts + 1):
+            self.stats.incr("attempts")
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                delay_s = self.next_delay(delay_s)
+                if not self._should_retry(e, attempt, started, delay_s):
+                    raise
+                time.sleep(delay_s)
+            else:
+                self.stats.incr("successes")
+                return result
+
+    async def call_async(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Awaits a coroutine function, retrying according to this policy without blocking the event loop.
+        """
+        started = self._start_call()
+        delay_s = self.base_delay_s
+
+        for attempt in range(1, self.max_attempts + 1):
+            self.stats.incr("attempts")
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                delay_s = self.next_delay(delay_s)
+                if not self._should_retry(e, attempt, started, delay_s):
+                    raise
+                await asyncio.sleep(delay_s)
+            else:
+                self.stats.incr("successes")
+                return result
+
+    def __call__(self, func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await self.call_async(func, *args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    print(f"Attempt #{attempt}")
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if attempt == max_attempts:
-                        print(f"Fatal failure at attempt {attempt}. Exiting...")
-                        raise e
-
-                    print(
-                        f"Failure at attempt {attempt}. Will retry in {delay_s:.2f} s"
-                    )
-                    time.sleep(delay_s)
+            return self.call(func, *args, **kwargs)
 
         return wrapper
 
-    return decorator_retry
+
+# Kept for existing callers. Both now use RetryPolicy with bounded, jittered delays.
+def retry(max_attempts=3, delay_s=1):
+    return RetryPolicy(max_attempts=max_attempts, base_delay_s=delay_s, max_delay_s=delay_s)
 
 
 def exponential_retry(
@@ -34,28 +262,5 @@ def exponential_retry(
     growth_rate: float = 1,
     jitter=False,
 ):
-    def decorator_exponential_retry(func):
-        def wrapper(*args, **kwargs):
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    print(f"Attempt #{attempt}")
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if attempt == max_attempts:
-                        print(f"Fatal failure at attempt {attempt}. Exiting...")
-                        raise e
-
-                    time_to_wait_s = (
-                        growth_modifier * exp(attempt * growth_rate)
-                    ) + initial_delay_s
-                    if jitter:
-                        time_to_wait_s = uniform(time_to_wait_s - 1, time_to_wait_s + 1)
-
-                    print(
-                        f"Failure at attempt {attempt}. Will retry in {time_to_wait_s:.2f} s"
-                    )
-                    time.sleep(time_to_wait_s)
-
-        return wrapper
-
-    return decorator_exponential_retry
+    max_delay_s = initial_delay_s + growth_modifier * (2 ** (growth_rate * max_attempts))
+    return RetryPolicy(max_attempts=max_attempts, base_delay_s=initial_delay_s, max_delay_s=max_delay_s)
@@ -10,5 +10,106 @@ WEB_SCRAPER_URL = os.getenv("WEB_SCRAPER_URL", "http://web-scraper:8000")
 NLP_URL = os.getenv("NLP_URL", "http://nlp:8000")
 DB_SERVICE_URL = os.getenv("DB_SERVICE_URL", "http://db-service:8001")
 CACHE_TTL = int(os.getenv("CACHE_TTL", 3600))
+# After CACHE_TTL an entry is stale: served for up to CACHE_STALE_TTL more while one
+# background refresh runs. XFETCH_BETA > 1 refreshes hot keys earlier, 0 disables it.
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", 3600))
+XFETCH_BETA = float(os.getenv("XFETCH_BETA", 1.0))
+# Cache entries are stored as pre-encoded JSON, zlib-compressed from this size up
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024))
+CACHE_COMPRESSION_LEVEL = int(os.getenv("CACHE_COMPRESSION_LEVEL", 6))
+# Pipeline stage caches: scraped content per URL, and NLP output per content hash and
+# model version, so changing NLP_MODEL_VERSION re-runs NLP without re-scraping
+SCRAPE_CACHE_TTL = int(os.getenv("SCRAPE_CACHE_TTL", 86400))
+NLP_CACHE_TTL = int(os.getenv("NLP_CACHE_TTL", 7 * 86400))
+NLP_MODEL_VERSION = os.getenv("NLP_MODEL_VERSION", "v1")
+# Analysis keys are namespaced by pipeline and model version, so results of different
+# versions coexist during a rollout and old ones simply expire
+ANALYSIS_PIPELINE_VERSION = os.getenv("ANALYSIS_PIPELINE_VERSION", "1")
+ANALYSIS_CACHE_VERSION = f"p{ANALYSIS_PIPELINE_VERSION}.{NLP_MODEL_VERSION}"
+
+# Failures that won't go away on retry (scraper 403/404/410/451, or no content) are
+# remembered for NEGATIVE_CACHE_TTL seconds with their reason
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", 600))
+NEGATIVE_CACHE_STATUSES = {403, 404, 410, 451}
 HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", 15))
 REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+
+# Downstream services, keyed by the name used for circuit breakers and health
+DOWNSTREAM_SERVICES = {
+    "web-scraper": WEB_SCRAPER_URL,
+    "nlp": NLP_URL,
+    "db-service": DB_SERVICE_URL,
+}
+
+# Article listing. Pages from the db-service are cached for ARTICLES_PAGE_CACHE_TTL seconds
+# under the current value of ARTICLES_VERSION_KEY, which writers bump to retire all pages.
+ARTICLES_PAGE_CACHE_TTL = int(os.getenv("ARTICLES_PAGE_CACHE_TTL", 30))
+ARTICLES_MAX_PAGE_SIZE = int(os.getenv("ARTICLES_MAX_PAGE_SIZE", 100))
+ARTICLES_VERSION_KEY = os.getenv("ARTICLES_VERSION_KEY", "articles:version")
+ARTICLES_SEARCH_CACHE_TTL = int(os.getenv("ARTICLES_SEARCH_CACHE_TTL", 60))
+ARTICLES_SEARCH_MAX_OFFSET = int(os.getenv("ARTICLES_SEARCH_MAX_OFFSET", 1000))
+
+# Background health probes of each downstream's /health (see utils/health_prober.py).
+# A service is marked down after HEALTH_PROBE_FAILURES failed probes in a row, and calls
+# to it fail fast with 503 until a probe succeeds again.
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", 5))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 2))
+HEALTH_PROBE_FAILURES = int(os.getenv("HEALTH_PROBE_FAILURES", 2))
+
+# Circuit breakers: open after N consecutive failures, or when the failure rate over the
+# last CIRCUIT_WINDOW_SIZE calls reaches CIRCUIT_FAILURE_RATE. Probe again after the timeout.
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", 0.5))
+CIRCUIT_WINDOW_SIZE = int(os.getenv("CIRCUIT_WINDOW_SIZE", 20))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", 30))
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", 1))
+
+# Shared HTTP client (one per worker) for downstream calls
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", 5))
+HTTP2 = os.getenv("HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Request coalescing: one worker holds a Redis lock per url_key while it runs the pipeline,
+# the others wait for its cached result (polling every ANALYSIS_LOCK_POLL_INTERVAL seconds)
+ANALYSIS_LOCK_TTL = float(os.getenv("ANALYSIS_LOCK_TTL", 2 * HTTP_TIMEOUT + 5))
+ANALYSIS_LOCK_POLL_INTERVAL = float(os.getenv("ANALYSIS_LOCK_POLL_INTERVAL", 0.2))
+
+# Per-worker L1 in front of the Redis cache. Entries never outlive their Redis TTL, and
+# rewrites/purges are broadcast on CACHE_INVALIDATION_CHANNEL to the other workers.
+L1_CACHE_MAX_ENTRIES = int(os.getenv("L1_CACHE_MAX_ENTRIES", 1024))
+L1_CACHE_TTL = float(os.getenv("L1_CACHE_TTL", 60))
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")
+
+# Async analysis jobs. Submissions go to USER_JOBS_STREAM, the prioritiser forwards them to
+# PRIORITISED_STREAM, and job_worker.py runs them as consumer group JOB_WORKER_GROUP.
+USER_JOBS_STREAM = os.getenv("USER_JOBS_STREAM", "user-jobs:to.be.scraped")
+PRIORITISED_STREAM = os.getenv("PRIORITISED_STREAM", "prioritised:to.be.scraped")
+JOB_WORKER_GROUP = os.getenv("JOB_WORKER_GROUP", "analysis-jobs")
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", 8))
+JOB_WORKER_RETRY_S = float(os.getenv("JOB_WORKER_RETRY_S", 5))
+JOB_TTL = int(os.getenv("JOB_TTL", 86400))
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", 0.5))
+JOB_EVENTS_TIMEOUT = float(os.getenv("JOB_EVENTS_TIMEOUT", 300))
+
+# POST /analysis/bulk: request size limit and how many pipeline runs a request may have in flight
+BULK_MAX_URLS = int(os.getenv("BULK_MAX_URLS", 500))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", 8))
+
+# Admission control. Pipeline runs (cache misses) per route and worker are capped at
+# ADMISSION_LIMITS; excess requests queue for up to ADMISSION_QUEUE_TARGET seconds, then
+# get 503. Each client (X-API-Key, else IP) has a Redis token bucket refilled at
+# RATE_LIMIT_RATE per second up to RATE_LIMIT_BURST, and gets 429 when it is empty.
+# A single analysis and a queued job cost one token; a bulk request costs RATE_LIMIT_BULK_COST
+# tokens once, however many URLs it has (its items are only held to ADMISSION_LIMITS["bulk"]).
+ADMISSION_LIMITS = {
+    "analyze": int(os.getenv("ADMISSION_ANALYZE_LIMIT", 32)),
+    "bulk": int(os.getenv("ADMISSION_BULK_LIMIT", 16)),
+}
+ADMISSION_QUEUE_TARGET = float(os.getenv("ADMISSION_QUEUE_TARGET", 0.5))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 256))
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", 2))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", 30))
+RATE_LIMIT_BULK_COST = min(int(os.getenv("RATE_LIMIT_BULK_COST", 5)), RATE_LIMIT_BURST)
@@ -0,0 +1,10 @@
+# gunicorn.conf.py (loaded automatically by gunicorn from the working directory)
+import os
+
+
+def child_exit(server, worker):
+    """Drop an exited worker's live gauges from the shared Prometheus metrics"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
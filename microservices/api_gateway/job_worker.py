@@ -0,0 +1,139 @@
+# job_worker.py
+"""Runs analysis jobs submitted through POST /analysis/jobs.
+
+Jobs are published to USER_JOBS_STREAM and forwarded by the job prioritiser to
+PRIORITISED_STREAM ahead of background work. This worker reads that stream as its own
+consumer group, runs `type: user` messages through the shared analysis pipeline (so
+results land in the same cache keys as /analysis/analyze) and acknowledges everything
+else untouched.
+
+Messages are read through common's RedisConsumerCombiner (in a thread, as it is
+synchronous), so payload codecs, claim checks and cluster stream names are handled the
+same way as in the other services. A message is acknowledged once its job state is
+final; if that fails it stays pending and is replayed on the next start.
+
+Run alongside the gateway from this directory (common/ must be importable; it is at
+/app/common in the image):
+
+    PYTHONPATH=../.. python job_worker.py
+"""
+import asyncio
+import logging
+import os
+import socket
+from typing import List, Optional, Tuple
+
+from common.redis_client.claim_check import ClaimCheckMissingError
+from common.redis_client.codecs import CodecError
+from common.redis_client.consumer_combiner import RedisConsumerCombiner
+from config import (
+    JOB_WORKER_CONCURRENCY,
+    JOB_WORKER_GROUP,
+    JOB_WORKER_RETRY_S,
+    PRIORITISED_STREAM,
+)
+from fastapi import HTTPException
+from utils.jobs import DONE, FAILED, RUNNING, update_job
+from utils.pipeline import analyze_url
+from utils.requests import close_http_client
+
+logger = logging.getLogger("api_gateway.job_worker")
+
+CONSUMER_NAME = os.getenv("JOB_WORKER_NAME", f"{socket.gethostname()}-{os.getpid()}")
+BLOCK_MS = 5000
+
+# (stream, redis message id, the user job it carries or None)
+Entry = Tuple[str, str, Optional[dict]]
+
+
+def user_job(message: dict) -> Optional[dict]:
+    """The job carried by a `type: user` message, or None for anything else.
+
+    Claim-checked messages keep their header inline, so background work is skipped
+    without fetching its body.
+    """
+    payload = message["data"]
+    if not hasattr(payload, "get"):
+        return None
+    try:
+        if (payload.get("header") or {}).get("type") != "user":
+            return None
+        data = payload.get("data")
+    except (ClaimCheckMissingError, CodecError) as e:
+        logger.warning("Skipping unreadable message %s: %s", message["redis_message_id"], e)
+        return None
+    return dict(data) if isinstance(data, dict) and "job_id" in data else None
+
+
+def read(consumer: RedisConsumerCombiner, pending: bool) -> Optional[List[Entry]]:
+    """Read the next batch (runs in a thread). With `pending`, replays this consumer's
+    unacknowledged messages and returns None once there are none left."""
+    if pending:
+        messages = consumer.consume_pending(JOB_WORKER_CONCURRENCY, raise_errors=True)
+        if not messages and not consumer.has_pending():
+            return None
+    else:
+        messages = consumer.consume_many(JOB_WORKER_CONCURRENCY, block=BLOCK_MS, raise_errors=True)
+    return [(m["stream"], m["redis_message_id"], user_job(m)) for m in messages]
+
+
+async def run_job(job: dict) -> None:
+    job_id = job["job_id"]
+    await update_job(job_id, RUNNING)
+    try:
+        await analyze_url(job["url"])
+    except HTTPException as e:
+        await update_job(job_id, FAILED, error=str(e.detail))
+    except Exception as e:
+        logger.exception("Analysis job %s failed", job_id)
+        await update_job(job_id, FAILED, error=str(e))
+    else:
+        await update_job(job_id, DONE)
+
+
+async def handle(stream: str, message_id: str, job: Optional[dict]) -> Optional[Tuple[str, str]]:
+    """Run the message's job, if any. Returns the message to acknowledge, or None to leave it pending"""
+    try:
+        if job is not None:
+            await run_job(job)
+    except Exception:
+        # e.g. Redis unavailable while recording job state
+        logger.exception("Failed to process message %s; it stays pending", message_id)
+        return None
+    # Job state is final (or the message is not ours), so it is safe to acknowledge
+    return stream, message_id
+
+
+async def main() -> None:
+    consumer = RedisConsumerCombiner(
+        streams=[PRIORITISED_STREAM], group_name=JOB_WORKER_GROUP, consumer_name=CONSUMER_NAME
+    )
+    logger.info("Consuming %s as %s/%s", PRIORITISED_STREAM, JOB_WORKER_GROUP, CONSUMER_NAME)
+
+    # Re-run our own unacknowledged messages from a previous run first, then read new ones
+    pending = True
+    try:
+        while True:
+            try:
+                entries = await asyncio.to_thread(read, consumer, pending)
+            except Exception as e:
+                logger.warning("Reading %s failed, retrying in %ss: %r", PRIORITISED_STREAM, JOB_WORKER_RETRY_S, e)
+                await asyncio.sleep(JOB_WORKER_RETRY_S)
+                continue
+            if entries is None:
+                pending = False
+                continue
+
+            acks = [ack for ack in await asyncio.gather(*(handle(*entry) for entry in entries)) if ack]
+            try:
+                await asyncio.to_thread(consumer.acknowledge_many, acks)
+            except Exception as e:
+                # Left pending: jobs are idempotent, so a replay after a restart only repeats work
+                logger.warning("Failed to acknowledge %d messages: %r", len(acks), e)
+    finally:
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,24 +1,49 @@
+import asyncio
 import logging
+import math
+from contextlib import asynccontextmanager
 
-from config import CACHE_TTL, NLP_URL, WEB_SCRAPER_URL
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
-from routers import analysis, articles, database, health, sources
-from utils.cache import get_cache, set_cache
-from utils.helpers import httpx_encode, url_key
-from utils.requests import fetch_json
-
-app = FastAPI(title="Sentinel API Gateway", version="0.1")
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response
+from routers import analysis, articles, database, health, metrics, sources
+from utils.admission import Admission, AdmissionError
+from utils.cache import listen_for_invalidations
+from utils.cache_format import wrap
+from utils.circuit_breaker import CircuitOpenError
+from utils.health_prober import run_health_prober
+from utils.metrics import MetricsMiddleware
+from utils.pipeline import analyze_url
+from utils.requests import close_http_client, get_http_client
 
 logger = logging.getLogger("api_gateway")
 logging.basicConfig(level=logging.INFO)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients when a worker starts and close them on shutdown"""
+    client = get_http_client()
+    tasks = [
+        asyncio.create_task(listen_for_invalidations()),
+        asyncio.create_task(run_health_prober(client)),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_http_client()
+
+
+app = FastAPI(title="Sentinel API Gateway", version="0.1", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health.router)
 app.include_router(database.router)
 app.include_router(analysis.router)
 app.include_router(articles.router)
 app.include_router(sources.router)
+app.include_router(metrics.router)
 
 
 # Legacy endpoint for backward compatibility
@@ -30,39 +55,29 @@ async def healthz():
 
 # Legacy analyze endpoint for backward compatibility
 @app.get("/analyze")
-async def analyze(url: str = Query(..., description="URL of article to analyze")):
+async def analyze(request: Request, url: str = Query(..., description="URL of article to analyze")):
     """Legacy analyze endpoint - maintained for backward compatibility
 
     Note: New analyze logic is in /analysis/analyze router.
-    This endpoint maintains the original implementation for existing clients.
+    This endpoint keeps the original response shape for existing clients and
+    shares the coalesced pipeline in utils/pipeline.py.
     """
-    key = url_key(url)
-
-    # 1) Check cache
-    cached = await get_cache(key)
-    if cached:
-        return JSONResponse({"cached": True, "data": cached})
-
-    # 2) Orchestrate: scrape -> nlp -> combine
     try:
-        # call scraper
-        scrape_url = f"{WEB_SCRAPER_URL}/scrape?url={httpx_encode(url)}"
-        scraped = await fetch_json(scrape_url, method="GET")
-        if not scraped or "content" not in scraped:
-            raise HTTPException(status_code=502, detail="Scraper returned no content")
-
-        # call NLP
-        nlp_req = {"url": url, "content": scraped}
-        analysis_result = await fetch_json(
-            f"{NLP_URL}/analyze", method="POST", json=nlp_req
-        )
-
-        # store cache
-        await set_cache(key, analysis_result, ttl=CACHE_TTL)
-
-        return {"cached": False, "data": analysis_result}
+        analysis_result, cached = await analyze_url(url, Admission.for_request(request, "analyze"))
     except HTTPException:
         raise
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
     except Exception as e:
         logger.exception("Failed analyze pipeline")
         raise HTTPException(status_code=500, detail=str(e))
+
+    if cached:
+        return Response(wrap(analysis_result, cached=True), media_type="application/json")
+    return {"cached": False, "data": analysis_result}
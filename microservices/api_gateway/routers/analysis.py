@@ -1,24 +1,37 @@
 # routers/analysis.py
+import asyncio
+import json
+import math
 import os
 import sys
 import logging
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import JSONResponse
+import time
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
 
 # Allow running this module directly or via relative import
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import CACHE_TTL, NLP_URL, WEB_SCRAPER_URL
-from utils.cache import get_cache, set_cache
-from utils.helpers import httpx_encode, url_key
-from utils.requests import fetch_json
+from config import (
+    BULK_CONCURRENCY,
+    BULK_MAX_URLS,
+    JOB_EVENTS_POLL_INTERVAL,
+    JOB_EVENTS_TIMEOUT,
+    RATE_LIMIT_BULK_COST,
+)
+from utils.admission import Admission, AdmissionError, client_id
+from utils.cache_format import wrap
+from utils.circuit_breaker import CircuitOpenError
+from utils.jobs import FINISHED, get_job, job_view, submit_job
+from utils.pipeline import analyze_url, analyze_urls
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 logger = logging.getLogger("api_gateway.analysis")
 
 
 @router.get("/analyze")
-async def analyze(url: str = Query(..., description="URL of the article to analyze")):
+async def analyze(request: Request, url: str = Query(..., description="URL of the article to analyze")):
     """
     Run the analysis pipeline for a given article URL.
 
@@ -27,31 +40,139 @@ async def analyze(url: str = Query(..., description="URL of the article to analy
       2. Scrape the article text via the Web Scraper service
       3. Send the scraped content to the NLP service for analysis
       4. Cache and return the combined result
+
+    Concurrent requests for the same URL share one pipeline run (see utils/pipeline.py).
+    Cache misses are subject to admission control: 429 when the client is over its rate
+    limit, 503 when the route is overloaded, both with Retry-After.
     """
-    key = url_key(url)
+    try:
+        analysis, cached = await analyze_url(url, Admission.for_request(request, "analyze"))
+    except HTTPException:
+        raise
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except Exception as e:
+        logger.exception("Error in analysis pipeline")
+        raise HTTPException(status_code=500, detail=str(e))
 
-    # Check Redis cache first
-    cached = await get_cache(key)
     if cached:
-        return JSONResponse({"cached": True, "data": cached})
+        return Response(wrap(analysis, cached=True), media_type="application/json")
+    return {"cached": False, "data": analysis}
+
+
+class BulkAnalysisRequest(BaseModel):
+    urls: list[str]
+
+
+def _item_error(e: BaseException) -> dict:
+    """Status and detail for one failed URL, matching what /analysis/analyze would return"""
+    if isinstance(e, HTTPException):
+        return {"status": e.status_code, "error": e.detail}
+    if isinstance(e, CircuitOpenError):
+        return {"status": 503, "error": str(e), "retry_after": math.ceil(e.retry_after)}
+    if isinstance(e, AdmissionError):
+        return {"status": e.status_code, "error": str(e), "retry_after": int(e.headers["Retry-After"])}
+    logger.error("Error in bulk analysis item", exc_info=e)
+    return {"status": 500, "error": str(e)}
+
+
+@router.post("/bulk")
+async def analyze_bulk(payload: BulkAnalysisRequest, request: Request):
+    """
+    Analyze many URLs in one request, streaming one JSON object per line (NDJSON).
+
+    Cached URLs come back first from a single batched lookup; the rest are analyzed
+    with bounded concurrency and streamed as they finish, so lines are not in request
+    order. Each line carries the URL's `index` in the request. A failed URL gets an
+    `error` line and does not affect the others, including URLs shed by admission control.
+
+    The request takes RATE_LIMIT_BULK_COST tokens from the client's rate limit once, when
+    its first uncached URL starts; if that is refused, every uncached URL gets a 429 line.
+    """
+    if len(payload.urls) > BULK_MAX_URLS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_URLS} URLs per request")
 
+    async def lines():
+        async for index, url, analysis, cached, error in analyze_urls(
+            payload.urls,
+            BULK_CONCURRENCY,
+            Admission.for_request(request, "bulk", cost=RATE_LIMIT_BULK_COST, per_request=True),
+        ):
+            if error is None:
+                yield wrap(analysis, index=index, url=url, cached=cached) + b"\n"
+            else:
+                yield json.dumps({"index": index, "url": url, **_item_error(error)}).encode() + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+class AnalysisJobRequest(BaseModel):
+    url: str
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(payload: AnalysisJobRequest, request: Request):
+    """
+    Submit a URL for analysis without waiting for it.
+
+    The job goes through the Redis job pipeline as a `type: user` message and its
+    result is written to the same cache key /analysis/analyze uses. Poll the status
+    URL or follow the events URL (server-sent events) for the outcome.
+
+    Jobs that have to be queued take a token from the same rate limit as
+    /analysis/analyze, so 429 with Retry-After when the client is over it.
+    """
     try:
-        # Scrape article content
-        scrape_url = f"{WEB_SCRAPER_URL}/scrape?url={httpx_encode(url)}"
-        scraped = await fetch_json(scrape_url, method="GET")
-        if not scraped or "content" not in scraped:
-            raise HTTPException(status_code=502, detail="Scraper returned no content")
+        job = await submit_job(payload.url, client_id(request))
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"{router.prefix}/jobs/{job['job_id']}",
+        "events_url": f"{router.prefix}/jobs/{job['job_id']}/events",
+    }
 
-        # Send scraped text to NLP service
-        nlp_req = {"url": url, "content": scraped}
-        analysis = await fetch_json(f"{NLP_URL}/analyze", method="POST", json=nlp_req)
 
-        # Cache the result
-        await set_cache(key, analysis, ttl=CACHE_TTL)
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status of an analysis job, with the analysis once it is done"""
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return await job_view(job)
 
-        return {"cached": False, "data": analysis}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception("Error in analysis pipeline")
-        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events for an analysis job: one `status` event per change, ending when it finishes"""
+    if await get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def events():
+        deadline = time.monotonic() + JOB_EVENTS_TIMEOUT
+        last = None
+        while time.monotonic() < deadline:
+            job = await get_job(job_id)
+            if job is None:
+                yield "event: error\ndata: {\"detail\": \"Job expired\"}\n\n"
+                return
+            if job["status"] != last:
+                last = job["status"]
+                yield f"event: status\ndata: {json.dumps(await job_view(job))}\n\n"
+                if last in FINISHED:
+                    return
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+        yield "event: timeout\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
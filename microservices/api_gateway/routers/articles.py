@@ -1,22 +1,94 @@
-from fastapi import APIRouter
+import logging
+import math
+import uuid
+from typing import List, Optional
+
+import httpx
+from config import ARTICLES_MAX_PAGE_SIZE, ARTICLES_SEARCH_MAX_OFFSET
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi.responses import Response
+from utils.articles import get_article, get_articles_batch, get_articles_page, get_search_results
+from utils.circuit_breaker import CircuitOpenError
+from utils.etag import json_response
 
 router = APIRouter(prefix="/articles", tags=["articles"])
+logger = logging.getLogger("api_gateway.articles")
+
+
+def _downstream_error(e: Exception) -> HTTPException:
+    """Pass db-service client errors through; anything else is a 502/503 from the gateway"""
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+        try:
+            detail = e.response.json().get("detail")
+        except ValueError:
+            detail = e.response.text
+        return HTTPException(status_code=e.response.status_code, detail=detail)
+    logger.error(f"db-service request failed: {e!r}")
+    return HTTPException(status_code=502, detail="Database service request failed")
+
+
+@router.get("/")
+async def list_articles(
+    request: Request,
+    limit: int = Query(20, ge=1, le=ARTICLES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status: Optional[str] = Query(None, description="Only articles with this analysis_status"),
+    source_id: Optional[str] = None,
+):
+    """List articles newest first with cursor pagination.
+
+    Follow `next_cursor` until it is null; every page costs the same however deep it is.
+    Responses carry an ETag, so clients polling with If-None-Match get 304 while the
+    page hasn't changed.
+    """
+    try:
+        body = await get_articles_page(limit, cursor, status, source_id)
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        raise _downstream_error(e)
+    return json_response(request, body)
+
+
+# Declared before any /{article_id} route so "search" is never taken for an ID
+@router.get("/search")
+async def search_articles(
+    request: Request,
+    q: str = Query(..., min_length=1, description='Search terms; supports "phrases", OR and -exclusions'),
+    limit: int = Query(20, ge=1, le=ARTICLES_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=ARTICLES_SEARCH_MAX_OFFSET),
+    status: Optional[str] = Query(None, description="Only articles with this analysis_status"),
+):
+    """Full-text search over article titles and content, best matches first.
+
+    Pass `next_offset` back as `offset` for the next page. Results of repeated queries
+    come from a short-lived cache and carry an ETag like the listing.
+    """
+    try:
+        body = await get_search_results(q, limit, offset, status)
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        raise _downstream_error(e)
+    return json_response(request, body)
+
+
+@router.post("/batch")
+async def get_articles(ids: List[uuid.UUID] = Body(..., embed=True)):
+    """Fetch many articles by ID in one request; unknown IDs are listed under `missing`.
+
+    The db-service answers cached articles with one Redis round trip and the rest with one query.
+    """
+    try:
+        body = await get_articles_batch([str(article_id) for article_id in ids])
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        raise _downstream_error(e)
+    return Response(body, media_type="application/json")
 
 
-# Future endpoints will be added here following the DATABASE_OPERATIONS_GUIDE.md
-# Examples (DO NOT IMPLEMENT YET):
-#
-# @router.get("/", response_model=List[ArticleResponse])
-# async def list_articles(limit: int = 10, offset: int = 0, status: Optional[str] = None):
-#     """List articles with pagination and filtering"""
-#     pass
-#
-# @router.get("/{article_id}", response_model=ArticleResponse)
-# async def get_article(article_id: uuid.UUID):
-#     """Get specific article by ID"""
-#     pass
-#
-# @router.get("/search")
-# async def search_articles(query: str, limit: int = 10):
-#     """Search articles by content/title"""
-#     pass
+@router.get("/{article_id}")
+async def get_article_by_id(request: Request, article_id: uuid.UUID):
+    """One article with its content. Carries an ETag, so unchanged articles revalidate with 304"""
+    try:
+        body = await get_article(str(article_id))
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        raise _downstream_error(e)
+    return json_response(request, body)
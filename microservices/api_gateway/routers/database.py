@@ -2,9 +2,9 @@ import logging
 import os
 import sys
 
-from config import DB_SERVICE_URL
 from fastapi import APIRouter
-from utils.requests import fetch_json
+from utils.circuit_breaker import get_breaker
+from utils.health_prober import UNKNOWN, UP, service_health
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,15 +16,20 @@ logger = logging.getLogger("api_gateway.database")
 
 @router.get("/status")
 async def database_status():
-    """Check database service status"""
-    try:
-        # Call the database service health endpoint
-        db_health = await fetch_json(f"{DB_SERVICE_URL}/health", method="GET")
-        return {"database_service": db_health, "gateway_status": "connected"}
-    except Exception as e:
-        logger.error(f"Database service unreachable: {e}")
+    """Check database service status, as of the last background health probe"""
+    health = service_health("db-service")
+    probe = {"latency_ms": health.get("latency_ms"), "checked_at": health.get("checked_at")}
+    if health["status"] == UP:
         return {
-            "database_service": "unreachable",
-            "gateway_status": "disconnected",
-            "error": str(e),
+            "database_service": health["detail"],
+            "gateway_status": "connected",
+            "probe": probe,
+            "circuit": get_breaker("db-service").snapshot(),
         }
+    return {
+        "database_service": "unreachable" if health["status"] != UNKNOWN else UNKNOWN,
+        "gateway_status": "disconnected",
+        "error": health.get("error"),
+        "probe": probe,
+        "circuit": get_breaker("db-service").snapshot(),
+    }
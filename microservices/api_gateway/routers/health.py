@@ -1,9 +1,53 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from utils.admission import admission_stats
+from utils.cache import cache_stats
+from utils.circuit_breaker import breaker_states
+from utils.health_prober import DOWN, UNKNOWN, health_map
+from utils.requests import http_pool_stats
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 
 @router.get("/")
 async def healthz():
-    """API Gateway health check"""
-    return {"status": "ok"}
+    """API Gateway health check, with the circuit state of each downstream"""
+    return {"status": "ok", "circuits": breaker_states()}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness from the background probes of each downstream; never calls them.
+
+    503 until every service has been probed once. "degraded" while some are down, since
+    cached analyses can still be served.
+    """
+    services = health_map()
+    statuses = {entry["status"] for entry in services.values()}
+    if UNKNOWN in statuses:
+        return JSONResponse({"status": "starting", "services": services}, status_code=503)
+    return {"status": "degraded" if DOWN in statuses else "ready", "services": services}
+
+
+@router.get("/circuits")
+async def circuits():
+    """Circuit breaker state per downstream service"""
+    return breaker_states()
+
+
+@router.get("/http-pool")
+async def http_pool():
+    """Connection pool usage of the shared downstream HTTP client"""
+    return http_pool_stats()
+
+
+@router.get("/cache")
+async def cache():
+    """Hit ratios of the per-worker L1 cache and of Redis behind it"""
+    return cache_stats()
+
+
+@router.get("/admission")
+async def admission():
+    """Per-route concurrency limits and rate limiter counters"""
+    return admission_stats()
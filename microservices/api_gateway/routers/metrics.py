@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from utils.metrics import render
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this gateway (all workers in multiprocess mode)"""
+    body, content_type = render()
+    return Response(body, headers={"Content-Type": content_type})
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The gateway imports its modules top-level (from config import ..., from utils.x import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
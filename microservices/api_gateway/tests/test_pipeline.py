@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import utils.cache as cache  # noqa: E402
+import utils.pipeline as pipeline  # noqa: E402
+from utils.helpers import url_key  # noqa: E402
+
+URL = "https://news.example.com/article"
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(cache, "_redis", fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(cache, "_raw_redis", fakeredis.aioredis.FakeRedis(server=server))
+    cache._l1.clear()
+    yield server
+    cache._l1.clear()
+
+
+def test_miss_during_background_refresh_waits_for_the_refresh(redis_server, monkeypatch):
+    runs = []
+
+    async def slow_pipeline(url):
+        runs.append(url)
+        await asyncio.sleep(0.3)
+        return {"version": 2}
+
+    monkeypatch.setattr(pipeline, "_run_pipeline", slow_pipeline)
+
+    async def scenario():
+        key = url_key(URL)
+        # Already stale, so the next hit is served from cache and starts a refresh
+        await cache.set_cache(key, {"version": 1}, ttl=0)
+        body, cached = await pipeline.analyze_url(URL)
+        assert cached and json.loads(body) == {"version": 1}
+        assert key in pipeline._refreshes
+
+        # Purged while the refresh runs: the miss must wait for it, not join it
+        await cache.delete_cache(key)
+        body, cached = await pipeline.analyze_url(URL)
+        assert cached and json.loads(body) == {"version": 2}
+        assert runs == [URL]
+
+    asyncio.run(scenario())
@@ -0,0 +1,239 @@
+# admission control: per-route concurrency limits and per-client token buckets
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from config import (
+    ADMISSION_LIMITS,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TARGET,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_RATE,
+)
+from fastapi import Request
+from utils.cache import get_redis
+
+logger = logging.getLogger("api_gateway.admission")
+
+# Refill by elapsed time (Redis clock, so every worker agrees), then try to take `cost` tokens.
+# Returns {allowed, seconds until enough tokens}; floats go back as strings.
+_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class AdmissionError(Exception):
+    """Raised instead of starting work the gateway should not take on right now"""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+    @property
+    def headers(self) -> dict:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class OverloadedError(AdmissionError):
+    status_code = 503
+
+
+class RateLimitedError(AdmissionError):
+    status_code = 429
+
+
+class ConcurrencyLimiter:
+    """Caps concurrent pipeline runs for a route within this worker.
+
+    Requests over the limit queue for at most `queue_target` seconds. When a queued request
+    misses that target the route counts as overloaded for the next `queue_target` seconds,
+    and during that time requests that would have to queue are shed immediately, so
+    queueing delay (and p99) stays bounded instead of growing with the backlog.
+    """
+
+    def __init__(self, name: str, limit: int, queue_target: float, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.queue_target = queue_target
+        self.max_queue = max_queue
+
+        self._semaphore = asyncio.Semaphore(limit)
+        self._overloaded_until = 0.0
+        # Smoothed time a slot is held, used to suggest a Retry-After
+        self._avg_hold_s = 1.0
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def _shed(self, reason: str) -> OverloadedError:
+        self.shed += 1
+        return OverloadedError(f"{self.name} is overloaded ({reason})", retry_after=self._avg_hold_s)
+
+    async def _acquire(self) -> None:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+
+        if time.monotonic() < self._overloaded_until:
+            raise self._shed("queueing delay over target")
+        if self.queued >= self.max_queue:
+            raise self._shed("queue full")
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_target)
+        except asyncio.TimeoutError:
+            self._overloaded_until = time.monotonic() + self.queue_target
+            raise self._shed("queueing delay over target")
+        finally:
+            self.queued -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self._acquire()
+        self.admitted += 1
+        self.in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._avg_hold_s = 0.8 * self._avg_hold_s + 0.2 * (time.monotonic() - start)
+            self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "overloaded": time.monotonic() < self._overloaded_until,
+            "avg_hold_s": round(self._avg_hold_s, 3),
+        }
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+_rate_limit_stats = {"allowed": 0, "limited": 0, "errors": 0}
+_token_bucket = None
+
+
+def get_limiter(route: str) -> ConcurrencyLimiter:
+    limiter = _limiters.get(route)
+    if limiter is None:
+        limiter = _limiters[route] = ConcurrencyLimiter(
+            route, ADMISSION_LIMITS[route], ADMISSION_QUEUE_TARGET, ADMISSION_MAX_QUEUE
+        )
+    return limiter
+
+
+def client_id(request: Request) -> str:
+    """Rate limit identity: the API key if one is sent, otherwise the client address"""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        # Don't keep raw keys in Redis
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+async def check_rate_limit(client: str, cost: int = 1) -> None:
+    """Take `cost` tokens from the client's bucket or raise RateLimitedError.
+
+    Fails open if Redis is unavailable; the concurrency limits still apply.
+    """
+    global _token_bucket
+    if not RATE_LIMIT_ENABLED:
+        return
+    try:
+        r = await get_redis()
+        if _token_bucket is None:
+            _token_bucket = r.register_script(_TOKEN_BUCKET)
+        allowed, wait = await _token_bucket(
+            keys=[f"ratelimit:{client}"], args=[RATE_LIMIT_RATE, RATE_LIMIT_BURST, cost]
+        )
+    except Exception:
+        _rate_limit_stats["errors"] += 1
+        logger.warning("Rate limit check failed, admitting request", exc_info=True)
+        return
+
+    if int(allowed):
+        _rate_limit_stats["allowed"] += 1
+        return
+    _rate_limit_stats["limited"] += 1
+    raise RateLimitedError("Rate limit exceeded", retry_after=float(wait))
+
+
+class Admission:
+    """What a request has to pass before it may start a pipeline run: the client's token
+    bucket, then a slot in the route's concurrency limit. Cache hits never get here.
+
+    With `per_request`, the bucket is charged `cost` tokens once, by the first run the
+    request starts, and every later run shares that outcome; each run still needs its
+    own concurrency slot. Bulk requests use this so their size doesn't drain the bucket.
+    """
+
+    def __init__(self, route: str, client: str, cost: int = 1, per_request: bool = False):
+        self.limiter = get_limiter(route)
+        self.client = client
+        self.cost = cost
+        self.per_request = per_request
+        self._charge: Optional[asyncio.Future] = None
+
+    @classmethod
+    def for_request(
+        cls, request: Request, route: str, cost: int = 1, per_request: bool = False
+    ) -> "Admission":
+        return cls(route, client_id(request), cost, per_request)
+
+    async def _check_rate_limit(self) -> None:
+        if not self.per_request:
+            await check_rate_limit(self.client, self.cost)
+            return
+        if self._charge is None:
+            self._charge = asyncio.ensure_future(check_rate_limit(self.client, self.cost))
+        await asyncio.shield(self._charge)
+
+    @asynccontextmanager
+    async def run(self):
+        await self._check_rate_limit()
+        async with self.limiter.slot():
+            yield
+
+
+def admission_stats() -> dict:
+    return {
+        "routes": {name: limiter.snapshot() for name, limiter in _limiters.items()},
+        "rate_limit": {
+            "enabled": RATE_LIMIT_ENABLED,
+            "rate_per_s": RATE_LIMIT_RATE,
+            "burst": RATE_LIMIT_BURST,
+            **_rate_limit_stats,
+        },
+    }
@@ -0,0 +1,73 @@
+# article reads proxied to the db-service, with short-lived Redis caches of pages and searches
+import urllib.parse
+from typing import List, Optional
+
+from config import ARTICLES_PAGE_CACHE_TTL, ARTICLES_SEARCH_CACHE_TTL, ARTICLES_VERSION_KEY, DB_SERVICE_URL
+from utils.cache import get_raw_redis, get_response_cache, set_response_cache
+from utils.cache_format import EncodedJSON, dumps
+from utils.helpers import content_hash
+from utils.requests import fetch_json
+from utils.singleflight import SingleFlight
+
+_flights = SingleFlight()
+
+
+async def articles_version() -> str:
+    """Current generation of article data; bumping it retires every cached page"""
+    r = await get_raw_redis()
+    version = await r.get(ARTICLES_VERSION_KEY)
+    return version.decode() if version else "0"
+
+
+async def _cached_get(kind: str, path: str, params: dict, ttl: int) -> EncodedJSON:
+    """GET a db-service endpoint as JSON bytes, cached per articles version and query.
+
+    Concurrent misses for the same query in this worker share one db-service call.
+    """
+    params = {name: value for name, value in params.items() if value is not None}
+    key = f"articles:{kind}:{await articles_version()}:{content_hash(params)}"
+
+    body = await get_response_cache(key)
+    if body is not None:
+        return body
+
+    async def load() -> EncodedJSON:
+        result = await fetch_json(
+            f"{DB_SERVICE_URL}{path}?{urllib.parse.urlencode(params)}", method="GET", service="db-service"
+        )
+        body = dumps(result)
+        await set_response_cache(key, body, ttl)
+        return body
+
+    body, _ = await _flights.do(key, load)
+    return body
+
+
+async def get_articles_page(
+    limit: int, cursor: Optional[str], status: Optional[str], source_id: Optional[str]
+) -> EncodedJSON:
+    """One page of the article listing"""
+    params = {"limit": limit, "cursor": cursor, "status": status, "source_id": source_id}
+    return await _cached_get("page", "/articles", params, ARTICLES_PAGE_CACHE_TTL)
+
+
+async def get_search_results(q: str, limit: int, offset: int, status: Optional[str]) -> EncodedJSON:
+    """One page of ranked full-text results. Whitespace-only differences share a cache entry"""
+    params = {"q": " ".join(q.split()), "limit": limit, "offset": offset, "status": status}
+    return await _cached_get("search", "/articles/search", params, ARTICLES_SEARCH_CACHE_TTL)
+
+
+async def get_article(article_id: str) -> EncodedJSON:
+    """One article with its content. Not cached here: the db-service caches it and drops it on change"""
+    result = await fetch_json(
+        f"{DB_SERVICE_URL}/articles/{urllib.parse.quote(article_id)}", method="GET", service="db-service"
+    )
+    return dumps(result)
+
+
+async def get_articles_batch(ids: List[str]) -> EncodedJSON:
+    """Many articles in one db-service call: {"items": [...], "missing": [...]}"""
+    result = await fetch_json(
+        f"{DB_SERVICE_URL}/articles/batch", method="POST", json={"ids": ids}, service="db-service"
+    )
+    return dumps(result)
@@ -1,10 +1,38 @@
+import asyncio
 import json
+import logging
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
 from typing import Any, Optional
 
 import redis.asyncio as redis
-from config import REDIS_URL
+from config import (
+    CACHE_COMPRESS_MIN_BYTES,
+    CACHE_COMPRESSION_LEVEL,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_STALE_TTL,
+    CACHE_TTL,
+    L1_CACHE_MAX_ENTRIES,
+    L1_CACHE_TTL,
+    NEGATIVE_CACHE_TTL,
+    REDIS_URL,
+    XFETCH_BETA,
+)
+from utils.cache_format import EncodedJSON, decode_entry, dumps, encode_entry
+from utils.metrics import CACHE_INVALIDATIONS, CACHE_LOOKUPS, CACHE_NEGATIVE_HITS, CACHE_STALE_HITS
+
+logger = logging.getLogger("api_gateway.cache")
 
 _redis = None
+_raw_redis = None
+
+# Identifies this worker's invalidation messages so it can skip its own
+_WORKER_ID = uuid.uuid4().hex
 
 
 async def get_redis():
@@ -14,17 +42,318 @@ async def get_redis():
     return _redis
 
 
+async def get_raw_redis():
+    """Client that returns bytes, for the binary cache entries"""
+    global _raw_redis
+    if _raw_redis is None:
+        _raw_redis = redis.from_url(REDIS_URL)
+    return _raw_redis
+
+
+class LocalCache:
+    """Bounded in-process LRU with a per-entry expiry.
+
+    Values are shared between callers, so they must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value for min(ttl, self.ttl) seconds"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@dataclass
+class CacheEntry:
+    """A cached value, kept as JSON bytes, with its soft expiry.
+
+    `body` can be written to a response as-is; `value` parses it on first use.
+    Past `fresh_until` the value is stale but still served until Redis drops the key
+    `stale_ttl` seconds later. `delta` is how long the value took to compute, which
+    scales how early a probabilistic refresh may start.
+    """
+
+    body: EncodedJSON
+    fresh_until: float
+    delta: float = 0.0
+
+    @cached_property
+    def value(self) -> Any:
+        return json.loads(self.body)
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+    def should_refresh(self, beta: float = XFETCH_BETA) -> bool:
+        """True if stale, or with a probability that rises as the soft expiry nears (XFetch)"""
+        if self.is_stale:
+            return True
+        if self.delta <= 0 or beta <= 0:
+            return False
+        # -log(U) is exponentially distributed, so expensive and hot keys refresh earlier
+        return time.time() - self.delta * beta * math.log(1.0 - random.random()) >= self.fresh_until
+
+
+_l1 = LocalCache(L1_CACHE_MAX_ENTRIES, L1_CACHE_TTL)
+_stats = {
+    "l1_hits": 0,
+    "l1_misses": 0,
+    "redis_hits": 0,
+    "redis_misses": 0,
+    "stale_hits": 0,
+    "negative_hits": 0,
+    "invalidations": 0,
+}
+_counters = {
+    "l1_hits": CACHE_LOOKUPS.labels("l1", "hit"),
+    "l1_misses": CACHE_LOOKUPS.labels("l1", "miss"),
+    "redis_hits": CACHE_LOOKUPS.labels("redis", "hit"),
+    "redis_misses": CACHE_LOOKUPS.labels("redis", "miss"),
+    "stale_hits": CACHE_STALE_HITS,
+    "negative_hits": CACHE_NEGATIVE_HITS,
+    "invalidations": CACHE_INVALIDATIONS,
+}
+
+
+def _count(stat: str) -> None:
+    _stats[stat] += 1
+    _counters[stat].inc()
+
+
+def _decode(raw: bytes) -> CacheEntry:
+    # Entries written as plain JSON before the binary format are fresh until Redis expires them
+    return CacheEntry(*decode_entry(raw))
+
+
 async def get_cache(key: str) -> Optional[Any]:
-    r = await get_redis()
-    raw = await r.get(key)
+    """Return the cached value, stale or not"""
+    entry = await get_cache_entry(key)
+    return entry.value if entry else None
+
+
+async def get_cache_entry(key: str) -> Optional[CacheEntry]:
+    entry = _l1.get(key)
+    if entry is not None:
+        _count("l1_hits")
+        if entry.is_stale:
+            _count("stale_hits")
+        return entry
+    _count("l1_misses")
+
+    r = await get_raw_redis()
+    # Fetch the remaining TTL in the same round trip so L1 never outlives Redis
+    async with r.pipeline(transaction=False) as pipe:
+        raw, pttl = await pipe.get(key).pttl(key).execute()
     if not raw:
+        _count("redis_misses")
         return None
+    _count("redis_hits")
+
+    entry = _decode(raw)
+    if entry.is_stale:
+        _count("stale_hits")
+    # pttl is -1 for keys without an expiry
+    _l1.set(key, entry, ttl=pttl / 1000 if pttl > 0 else None)
+    return entry
+
+
+async def get_cache_many(keys: list[str]) -> dict[str, CacheEntry]:
+    """Look up many keys: L1 first, then a single MGET for the rest. Misses are omitted."""
+    found = {}
+    remaining = []
+    for key in keys:
+        entry = _l1.get(key)
+        if entry is None:
+            _count("l1_misses")
+            remaining.append(key)
+            continue
+        _count("l1_hits")
+        found[key] = entry
+
+    if remaining:
+        r = await get_raw_redis()
+        for key, raw in zip(remaining, await r.mget(remaining)):
+            if not raw:
+                _count("redis_misses")
+                continue
+            _count("redis_hits")
+            entry = found[key] = _decode(raw)
+            # MGET has no TTLs, so only keep fresh entries locally, and only until they go stale
+            if not math.isinf(entry.fresh_until):
+                _l1.set(key, entry, ttl=entry.fresh_until - time.time())
+
+    for entry in found.values():
+        if entry.is_stale:
+            _count("stale_hits")
+    return found
+
+
+async def set_cache(
+    key: str,
+    value: Any,
+    ttl: int = CACHE_TTL,
+    stale_ttl: int = CACHE_STALE_TTL,
+    delta: float = 0.0,
+) -> None:
+    """Cache a value that is fresh for `ttl` seconds and served stale for `stale_ttl` more.
+
+    `delta` is the time it took to compute the value, used for early refresh.
+    """
+    entry = CacheEntry(dumps(value), time.time() + ttl, delta)
+    raw = encode_entry(
+        entry.body, entry.fresh_until, delta, CACHE_COMPRESS_MIN_BYTES, CACHE_COMPRESSION_LEVEL
+    )
+
+    r = await get_raw_redis()
+    await r.set(key, raw, ex=ttl + stale_ttl)
+    _l1.set(key, entry, ttl=ttl + stale_ttl)
+    await _publish_invalidation(await get_redis(), key)
+
+
+async def get_stage_cache(key: str) -> Optional[Any]:
+    """Redis-only lookup for intermediate pipeline results (no L1, not in the hit ratios)"""
+    r = await get_raw_redis()
+    raw = await r.get(key)
+    return _decode(raw).value if raw else None
+
+
+async def set_stage_cache(key: str, value: Any, ttl: int) -> None:
+    body = dumps(value)
+    r = await get_raw_redis()
+    await r.set(
+        key,
+        encode_entry(body, time.time() + ttl, 0.0, CACHE_COMPRESS_MIN_BYTES, CACHE_COMPRESSION_LEVEL),
+        ex=ttl,
+    )
+
+
+async def get_response_cache(key: str) -> Optional[EncodedJSON]:
+    """Redis-only lookup of a response body that is sent as-is (no L1, not in the hit ratios)"""
+    r = await get_raw_redis()
+    raw = await r.get(key)
+    return _decode(raw).body if raw else None
+
+
+async def set_response_cache(key: str, body: EncodedJSON, ttl: int) -> None:
+    r = await get_raw_redis()
+    await r.set(
+        key,
+        encode_entry(body, time.time() + ttl, 0.0, CACHE_COMPRESS_MIN_BYTES, CACHE_COMPRESSION_LEVEL),
+        ex=ttl,
+    )
+
+
+async def get_negative_cache(key: str) -> Optional[dict]:
+    """The cached failure ({"status", "reason"}) for a key, if any"""
+    failures = await get_negative_cache_many([key])
+    return failures.get(key)
+
+
+async def get_negative_cache_many(keys: list[str]) -> dict[str, dict]:
+    if not keys:
+        return {}
+    r = await get_redis()
+    failures = {key: json.loads(raw) for key, raw in zip(keys, await r.mget(keys)) if raw}
+    for _ in failures:
+        _count("negative_hits")
+    return failures
+
+
+async def set_negative_cache(key: str, status: int, reason: str, ttl: int = NEGATIVE_CACHE_TTL) -> None:
+    r = await get_redis()
+    await r.set(key, json.dumps({"status": status, "reason": reason}), ex=ttl)
+
+
+async def delete_cache(key: str) -> None:
+    r = await get_redis()
+    await r.delete(key)
+    _l1.delete(key)
+    await _publish_invalidation(r, key)
+
+
+async def _publish_invalidation(r, key: str) -> None:
+    message = json.dumps({"origin": _WORKER_ID, "key": key})
     try:
-        return json.loads(raw)
+        await r.publish(CACHE_INVALIDATION_CHANNEL, message)
     except Exception:
-        return raw
+        # Other workers fall back to their L1 TTL
+        logger.warning("Failed to publish cache invalidation for %s", key, exc_info=True)
 
 
-async def set_cache(key: str, value: Any, ttl: int = 3600) -> None:
-    r = await get_redis()
-    await r.set(key, json.dumps(value), ex=ttl)
+async def listen_for_invalidations() -> None:
+    """Drop L1 entries that another worker rewrote or purged. Runs until cancelled."""
+    while True:
+        pubsub = None
+        try:
+            r = await get_redis()
+            pubsub = r.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            # Messages may have been missed while (re)connecting
+            _l1.clear()
+            async for message in pubsub.listen():
+                try:
+                    data = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    continue
+                if data.get("origin") == _WORKER_ID:
+                    continue
+                _l1.delete(data.get("key"))
+                _count("invalidations")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Cache invalidation listener disconnected, retrying", exc_info=True)
+            await asyncio.sleep(1)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def _ratio(hits: int, misses: int) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+def cache_stats() -> dict:
+    """Hit ratios for the in-process L1 and for Redis (looked up on L1 misses)"""
+    return {
+        **_stats,
+        "l1_hit_ratio": _ratio(_stats["l1_hits"], _stats["l1_misses"]),
+        "redis_hit_ratio": _ratio(_stats["redis_hits"], _stats["redis_misses"]),
+        "l1_entries": len(_l1),
+        "l1_max_entries": _l1.max_entries,
+        "l1_ttl": _l1.ttl,
+    }
@@ -0,0 +1,70 @@
+# binary storage format for analysis cache entries
+"""
+Every entry is a fixed header followed by the JSON-encoded value
+
+        b"\\x00SGC" | version (u8) | flags (u8) | fresh_until (f64) | delta (f64) | body
+
+The body is the compact UTF-8 JSON of the value, zlib-compressed when FLAG_ZLIB is set,
+so a hit can be copied into a response without being parsed. JSON text never starts
+with a NUL byte, so entries written as plain JSON before this format are told apart
+by the magic prefix.
+"""
+import json
+import math
+import struct
+import zlib
+from typing import Any, Tuple
+
+MAGIC = b"\x00SGC"
+VERSION = 1
+FLAG_ZLIB = 0x01
+
+_HEADER = struct.Struct(">4sBBdd")
+
+
+class EncodedJSON(bytes):
+    """JSON bytes ready to be written into a response as-is"""
+
+
+def dumps(value: Any) -> EncodedJSON:
+    return EncodedJSON(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def encode_entry(
+    body: bytes, fresh_until: float, delta: float, compress_min_bytes: int = 1024, level: int = 6
+) -> bytes:
+    flags = 0
+    if len(body) >= compress_min_bytes:
+        compressed = zlib.compress(body, level)
+        if len(compressed) < len(body):
+            body, flags = compressed, FLAG_ZLIB
+    return _HEADER.pack(MAGIC, VERSION, flags, fresh_until, delta) + body
+
+
+def decode_entry(raw: bytes) -> Tuple[EncodedJSON, float, float]:
+    """Return (json body, fresh_until, delta). Legacy JSON entries are fresh forever."""
+    if raw.startswith(MAGIC):
+        _, version, flags, fresh_until, delta = _HEADER.unpack_from(raw)
+        if version != VERSION:
+            raise ValueError(f"Unsupported cache entry version {version}")
+        body = raw[_HEADER.size :]
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+        return EncodedJSON(body), fresh_until, delta
+
+    # Plain json.dumps(value), or the {"value", "fresh_until", "delta"} envelope
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return dumps(raw.decode("utf-8", errors="replace")), math.inf, 0.0
+    if isinstance(data, dict) and "value" in data and "fresh_until" in data:
+        return dumps(data["value"]), data["fresh_until"], data.get("delta", 0.0)
+    return EncodedJSON(raw), math.inf, 0.0
+
+
+def wrap(data: Any, **fields) -> bytes:
+    """Serialize {**fields, "data": data}, splicing EncodedJSON data in without re-encoding"""
+    body = data if isinstance(data, EncodedJSON) else dumps(data)
+    head = json.dumps(fields)[:-1]
+    separator = ", " if fields else ""
+    return f'{head}{separator}"data": '.encode("utf-8") + body + b"}"
@@ -0,0 +1,143 @@
+# per-downstream circuit breakers so calls to an unhealthy service fail fast
+import time
+from collections import deque
+from typing import Dict
+
+from config import (
+    CIRCUIT_FAILURE_RATE,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_HALF_OPEN_MAX_CALLS,
+    CIRCUIT_RECOVERY_TIMEOUT,
+    CIRCUIT_WINDOW_SIZE,
+    DOWNSTREAM_SERVICES,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a downstream whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+
+
+class CircuitBreaker:
+    """Tracks the health of one downstream service.
+
+    closed    -> calls flow; consecutive failures or a high failure rate eject the service
+    open      -> calls fail immediately until the recovery timeout passes
+    half_open -> a limited number of probe calls decide between closed and open
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        window_size: int = CIRCUIT_WINDOW_SIZE,
+        recovery_timeout: float = CIRCUIT_RECOVERY_TIMEOUT,
+        half_open_max_calls: int = CIRCUIT_HALF_OPEN_MAX_CALLS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._half_open_calls = 0
+        self._window: deque = deque(maxlen=window_size)
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def retry_after(self) -> float:
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not go out"""
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._half_open_calls >= self.half_open_max_calls):
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_after() or self.recovery_timeout)
+        if state == HALF_OPEN:
+            self._half_open_calls += 1
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        self._window.append(True)
+        if self._state == HALF_OPEN:
+            self._close()
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        self._window.append(False)
+        if self._state == HALF_OPEN or self._should_eject():
+            self._open()
+
+    def release(self) -> None:
+        """Give back a half-open probe slot when a call ended without a verdict (e.g. cancelled)"""
+        if self._state == HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def _should_eject(self) -> bool:
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        # Only judge the failure rate once the window holds enough calls to mean something
+        if len(self._window) < self._window.maxlen:
+            return False
+        failures = self._window.count(False)
+        return failures / len(self._window) >= self.failure_rate
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+        self.times_opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._half_open_calls = 0
+        self._window.clear()
+
+    def snapshot(self) -> dict:
+        state = self.state
+        window = len(self._window)
+        return {
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_rate": (self._window.count(False) / window) if window else 0.0,
+            "retry_after": round(self.retry_after(), 1) if state == OPEN else 0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def breaker_states() -> Dict[str, dict]:
+    for name in DOWNSTREAM_SERVICES:
+        get_breaker(name)
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
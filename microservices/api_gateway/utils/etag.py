@@ -0,0 +1,33 @@
+# ETag / If-None-Match handling for JSON bodies the gateway already holds as bytes
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def etag(body: bytes) -> str:
+    """Strong validator from the response body itself, so equal pages get equal tags"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def if_none_match(request: Request, tag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return tag in {t.strip().removeprefix("W/") for t in header.split(",")}
+
+
+def json_response(request: Request, body: bytes, cache_control: str = "no-cache") -> Response:
+    """200 with the body and its ETag, or an empty 304 if the client already has it.
+
+    "no-cache" lets clients keep the body but makes them revalidate on every use, which
+    costs them a 304 while nothing changed.
+    """
+    tag = etag(body)
+    headers = {"ETag": tag, "Cache-Control": cache_control}
+    if if_none_match(request, tag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,115 @@
+# background health probes of the downstream services, served from a per-worker map
+"""
+Each worker probes every DOWNSTREAM_SERVICES entry at /health every HEALTH_PROBE_INTERVAL
+seconds and keeps the result (status, latency, last body) in memory. Health endpoints read
+that map, so polling them costs nothing downstream, and fetch_json refuses calls to a
+service the prober has seen fail HEALTH_PROBE_FAILURES times in a row (transport errors
+and 5xx only).
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+from config import (
+    DOWNSTREAM_SERVICES,
+    HEALTH_PROBE_FAILURES,
+    HEALTH_PROBE_INTERVAL,
+    HEALTH_PROBE_TIMEOUT,
+)
+from utils.circuit_breaker import CircuitOpenError
+from utils.metrics import DOWNSTREAM_UP
+
+logger = logging.getLogger("api_gateway.health")
+
+UNKNOWN = "unknown"
+UP = "up"
+DOWN = "down"
+
+_health: Dict[str, dict] = {
+    name: {"status": UNKNOWN, "consecutive_failures": 0} for name in DOWNSTREAM_SERVICES
+}
+
+
+class ServiceDownError(CircuitOpenError):
+    """Raised instead of calling a downstream that is failing its health probes"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        Exception.__init__(self, f"{name} is unavailable (failing health checks)")
+
+
+async def probe(client: httpx.AsyncClient, name: str, base_url: str) -> dict:
+    """Call one service's /health and update its entry in the map.
+
+    Like the circuit breaker, only transport errors (including timeouts) and 5xx responses
+    count as failures: a 4xx, e.g. a service without a /health route, still shows it is up.
+    """
+    entry = _health[name]
+    start = time.perf_counter()
+    error = None
+    try:
+        r = await client.get(f"{base_url}/health", timeout=HEALTH_PROBE_TIMEOUT)
+    except httpx.TransportError as e:
+        error = repr(e)
+    else:
+        if r.status_code >= 500:
+            error = f"HTTP {r.status_code} from /health"
+
+    if error is not None:
+        entry["consecutive_failures"] += 1
+        # Only a run of failed probes marks a service down, whether it was up or not yet probed
+        if entry["status"] != DOWN and entry["consecutive_failures"] >= HEALTH_PROBE_FAILURES:
+            logger.warning(f"{name} failed {entry['consecutive_failures']} health checks: {error}")
+            entry["status"] = DOWN
+        entry["error"] = error
+    else:
+        if entry["status"] == DOWN:
+            logger.info(f"{name} is healthy again")
+        try:
+            detail = r.json() if r.is_success else None
+        except ValueError:
+            detail = None
+        entry.update(
+            status=UP,
+            consecutive_failures=0,
+            detail=detail,
+            error=None if r.is_success else f"HTTP {r.status_code} from /health",
+        )
+    entry["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    entry["checked_at"] = time.time()
+    DOWNSTREAM_UP.labels(name).set(1 if entry["status"] == UP else 0)
+    return entry
+
+
+async def run_health_prober(client: httpx.AsyncClient) -> None:
+    """Probe all downstreams every HEALTH_PROBE_INTERVAL seconds until cancelled"""
+    while True:
+        await asyncio.gather(*(probe(client, name, url) for name, url in DOWNSTREAM_SERVICES.items()))
+        await asyncio.sleep(HEALTH_PROBE_INTERVAL)
+
+
+def service_health(name: str) -> Optional[dict]:
+    return _health.get(name)
+
+
+def health_map() -> Dict[str, dict]:
+    return {name: dict(entry) for name, entry in _health.items()}
+
+
+def check_reachable(name: str) -> None:
+    """Raise ServiceDownError if the last HEALTH_PROBE_FAILURES probes of this service failed.
+
+    Services not yet marked down, including ones never probed successfully, are let
+    through and left to the circuit breaker. Results older than a few probe intervals
+    (e.g. the prober isn't running) don't block calls either.
+    """
+    entry = _health.get(name)
+    if not entry or entry["status"] != DOWN:
+        return
+    age = time.time() - entry["checked_at"]
+    if age > 3 * HEALTH_PROBE_INTERVAL:
+        return
+    raise ServiceDownError(name, retry_after=max(1.0, HEALTH_PROBE_INTERVAL - age))
@@ -1,11 +1,28 @@
 import hashlib
+import json
 import urllib.parse
 
+from config import ANALYSIS_CACHE_VERSION
 
-def url_key(u: str) -> str:
-    """Generate deterministic cache key for URL"""
-    h = hashlib.sha256(u.encode("utf-8")).hexdigest()
-    return f"analysis:{h}"
+
+def url_hash(u: str) -> str:
+    return hashlib.sha256(u.encode("utf-8")).hexdigest()
+
+
+def url_key(u: str, version: str = ANALYSIS_CACHE_VERSION) -> str:
+    """Generate deterministic cache key for URL, namespaced by pipeline/model version"""
+    return f"analysis:{version}:{url_hash(u)}"
+
+
+def negative_key(u: str, version: str = ANALYSIS_CACHE_VERSION) -> str:
+    """Key remembering why a URL could not be analyzed"""
+    return f"neg:{version}:{url_hash(u)}"
+
+
+def content_hash(content) -> str:
+    """Hash of a JSON-serialisable value that doesn't depend on key order"""
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
 def httpx_encode(u: str) -> str:
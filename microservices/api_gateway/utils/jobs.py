@@ -0,0 +1,101 @@
+# async analysis jobs: job state in Redis hashes, submission through the job streams
+import hashlib
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from common.redis_client.codecs import DEFAULT_CODEC, encode_fields, get_codec
+from common.redis_client.keys import stream_key
+from config import JOB_TTL, USER_JOBS_STREAM
+from utils.admission import check_rate_limit
+from utils.cache import get_cache, get_negative_cache, get_redis
+from utils.helpers import negative_key, url_key
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+async def get_job(job_id: str) -> Optional[dict]:
+    r = await get_redis()
+    job = await r.hgetall(job_key(job_id))
+    return job or None
+
+
+async def update_job(job_id: str, status: str, error: Optional[str] = None) -> None:
+    fields = {"status": status, "updated_at": time.time()}
+    if error is not None:
+        fields["error"] = error
+    r = await get_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        await pipe.hset(job_key(job_id), mapping=fields).expire(job_key(job_id), JOB_TTL).execute()
+
+
+async def submit_job(url: str, client: Optional[str] = None) -> dict:
+    """Record a new job and publish it to the user job stream.
+
+    URLs that already have a cached analysis (or a cached failure) complete immediately
+    without a message. Otherwise `client`, if given, is charged one token of its rate
+    limit first (RateLimitedError when it is out).
+    """
+    job_id = uuid.uuid4().hex
+    cache_key = url_key(url)
+    now = time.time()
+    cached = await get_cache(cache_key)
+    failure = await get_negative_cache(negative_key(url)) if cached is None else None
+    job = {
+        "job_id": job_id,
+        "url": url,
+        "cache_key": cache_key,
+        "status": DONE if cached is not None else FAILED if failure else QUEUED,
+        "created_at": now,
+        "updated_at": now,
+    }
+    if failure:
+        job["error"] = failure["reason"]
+    if job["status"] == QUEUED and client is not None:
+        await check_rate_limit(client)
+
+    r = await get_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.hset(job_key(job_id), mapping=job).expire(job_key(job_id), JOB_TTL)
+        if job["status"] == QUEUED:
+            # Same stream name and entry format as common's RedisPublisher, which the prioritiser reads
+            pipe.xadd(stream_key(USER_JOBS_STREAM), encode_fields(_job_message(job), get_codec(DEFAULT_CODEC)))
+        await pipe.execute()
+    return job
+
+
+def _job_message(job: dict) -> dict:
+    """A common.models.api.redis_models.Message with a MessageUserJobPayload"""
+    return {
+        "header": {
+            "message_id": hashlib.md5(job["url"].encode()).hexdigest(),
+            "timestamp": datetime.now().isoformat(),
+            "type": "user",
+        },
+        "data": {"url": job["url"], "job_id": job["job_id"], "cache_key": job["cache_key"]},
+    }
+
+
+async def job_view(job: dict) -> dict:
+    """The public view of a job, with the analysis attached once it is done"""
+    view = {
+        "job_id": job["job_id"],
+        "url": job["url"],
+        "status": job["status"],
+        "created_at": float(job["created_at"]),
+        "updated_at": float(job["updated_at"]),
+    }
+    if job.get("error"):
+        view["error"] = job["error"]
+    if job["status"] == DONE:
+        view["data"] = await get_cache(job["cache_key"])
+    return view
@@ -0,0 +1,119 @@
+# Prometheus metrics for routes, downstream calls and the analysis cache
+"""
+Metrics live in the default prometheus_client registry of each worker. When
+PROMETHEUS_MULTIPROC_DIR is set (as in the Dockerfile) every gunicorn worker writes to
+that directory and /metrics aggregates all of them, so a scrape doesn't depend on which
+worker answers it. See gunicorn.conf.py for cleaning up after exited workers.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.routing import Match
+
+# Finer buckets at the low end for cache hits, up to 2 x HTTP_TIMEOUT for full pipelines
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30)
+
+HTTP_REQUESTS = Counter(
+    "gateway_http_requests_total", "HTTP requests by route template and status", ["route", "method", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "gateway_http_request_duration_seconds",
+    "Time to fully send the response, by route template",
+    ["route", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "gateway_http_requests_in_flight", "Requests being handled", ["route"], multiprocess_mode="livesum"
+)
+
+DOWNSTREAM_LATENCY = Histogram(
+    "gateway_downstream_request_duration_seconds",
+    "Downstream calls by service and outcome (ok, http_error, transport_error, error, circuit_open, cancelled)",
+    ["service", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+DOWNSTREAM_IN_FLIGHT = Gauge(
+    "gateway_downstream_requests_in_flight", "Downstream calls waiting for a response", ["service"],
+    multiprocess_mode="livesum",
+)
+DOWNSTREAM_UP = Gauge(
+    "gateway_downstream_up", "1 if the service's last health probe succeeded", ["service"],
+    multiprocess_mode="livemostrecent",
+)
+
+PIPELINE_STAGE_LATENCY = Histogram(
+    "gateway_pipeline_stage_duration_seconds",
+    "Analysis pipeline stages (scrape, nlp), by whether the stage cache had the result",
+    ["stage", "cached"],
+    buckets=LATENCY_BUCKETS,
+)
+
+CACHE_LOOKUPS = Counter(
+    "gateway_cache_lookups_total", "Analysis cache lookups by tier (l1, redis) and result (hit, miss)", ["tier", "result"]
+)
+CACHE_NEGATIVE_HITS = Counter(
+    "gateway_cache_negative_hits_total", "Requests answered from a cached failure instead of re-running the pipeline"
+)
+CACHE_STALE_HITS = Counter("gateway_cache_stale_hits_total", "Cache hits served past their soft TTL")
+CACHE_INVALIDATIONS = Counter("gateway_cache_invalidations_total", "L1 entries dropped on another worker's request")
+
+
+def render() -> tuple[bytes, str]:
+    """The metrics in Prometheus text format, aggregated over workers in multiprocess mode"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight count per route template.
+
+    Routes are labelled by their path template (e.g. /analysis/jobs/{job_id}) so label
+    cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _route_label(self, scope) -> str:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_label(scope)
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_LATENCY.labels(route, method).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(route, method, str(status)).inc()
+            in_flight.dec()
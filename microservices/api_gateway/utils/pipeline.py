@@ -0,0 +1,282 @@
+# the scrape -> nlp analysis pipeline shared by /analyze and /analysis/analyze
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+import httpx
+from config import (
+    ANALYSIS_LOCK_POLL_INTERVAL,
+    ANALYSIS_LOCK_TTL,
+    CACHE_TTL,
+    NEGATIVE_CACHE_STATUSES,
+    NLP_CACHE_TTL,
+    NLP_MODEL_VERSION,
+    NLP_URL,
+    SCRAPE_CACHE_TTL,
+    WEB_SCRAPER_URL,
+)
+from fastapi import HTTPException
+from utils.admission import Admission
+from utils.cache import (
+    get_cache_entry,
+    get_cache_many,
+    get_negative_cache,
+    get_negative_cache_many,
+    get_redis,
+    get_stage_cache,
+    set_cache,
+    set_negative_cache,
+    set_stage_cache,
+)
+from utils.cache_format import EncodedJSON
+from utils.helpers import content_hash, httpx_encode, negative_key, url_hash, url_key
+from utils.metrics import PIPELINE_STAGE_LATENCY
+from utils.requests import fetch_json
+from utils.singleflight import SingleFlight, acquire_lock, lock_exists, release_lock
+
+logger = logging.getLogger("api_gateway.pipeline")
+
+_flights = SingleFlight()
+# Background refreshes resolve to None rather than (analysis, cached), so they are kept
+# apart from _flights: a miss must never join one. It waits on the refresh's Redis lock instead.
+_refreshes = SingleFlight()
+
+
+class CacheableFailure(HTTPException):
+    """A failure that retrying won't fix (missing, forbidden or empty article).
+    Remembered in the negative cache so retries don't reach the scraper."""
+
+
+def _cached_failure(failure: dict) -> HTTPException:
+    return HTTPException(status_code=failure["status"], detail=failure["reason"])
+
+
+async def analyze_url(url: str, admission: Optional[Admission] = None) -> Tuple[Any, bool]:
+    """Return (analysis, cached) for a URL, running the pipeline on a cache miss.
+
+    Concurrent misses for the same URL are coalesced: within a worker they await one
+    shared task, and across workers/replicas a Redis lock lets one run the pipeline
+    while the others wait for its result to land in the cache.
+
+    Stale entries, and fresh ones picked for early (XFetch) refresh, are returned
+    immediately while a single background refresh runs under the same lock.
+
+    Cached analyses come back as EncodedJSON, to be written out without re-encoding
+    (see cache_format.wrap).
+
+    `admission` is only consulted when this call would start a new pipeline run, so
+    cache hits and callers joining a run already in flight are never limited.
+
+    URLs that recently failed permanently raise their cached failure instead.
+    """
+    key = url_key(url)
+
+    entry = await get_cache_entry(key)
+    if entry:
+        # Stale or close to expiry: answer from cache and refresh in the background
+        if entry.should_refresh():
+            _refresh_in_background(url, key)
+        return entry.body, True
+
+    failure = await get_negative_cache(negative_key(url))
+    if failure:
+        raise _cached_failure(failure)
+
+    return await _run_coalesced(url, key, admission)
+
+
+async def _run_coalesced(url: str, key: str, admission: Optional[Admission]) -> Tuple[Any, bool]:
+    gate = admission.run() if admission is not None and key not in _flights else nullcontext()
+    async with gate:
+        (analysis, cached), _ = await _flights.do(key, lambda: _run_locked(url, key))
+    return analysis, cached
+
+
+async def analyze_urls(
+    urls: list[str], concurrency: int, admission: Optional[Admission] = None
+) -> AsyncIterator[Tuple[int, str, Any, bool, BaseException | None]]:
+    """Yield (index, url, analysis, cached, error) for each URL as soon as it is ready.
+
+    Cache hits are resolved with one MGET and yielded first. Misses go through the same
+    coalesced pipeline as analyze_url, at most `concurrency` at a time, each passing
+    `admission` separately. A failing or shed URL is yielded with its exception instead
+    of stopping the others.
+    """
+    keys = [url_key(url) for url in urls]
+    entries = await get_cache_many(list(dict.fromkeys(keys)))
+
+    misses = []
+    for index, (url, key) in enumerate(zip(urls, keys)):
+        entry = entries.get(key)
+        if entry is None:
+            misses.append((index, url, key))
+            continue
+        if entry.should_refresh():
+            _refresh_in_background(url, key)
+        yield index, url, entry.body, True, None
+
+    failures = await get_negative_cache_many(list(dict.fromkeys(negative_key(url) for _, url, _ in misses)))
+    if failures:
+        remaining = []
+        for index, url, key in misses:
+            failure = failures.get(negative_key(url))
+            if failure:
+                yield index, url, None, False, _cached_failure(failure)
+            else:
+                remaining.append((index, url, key))
+        misses = remaining
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, url: str, key: str):
+        async with semaphore:
+            try:
+                analysis, cached = await _run_coalesced(url, key, admission)
+                return index, url, analysis, cached, None
+            except Exception as e:
+                return index, url, None, False, e
+
+    tasks = [asyncio.ensure_future(run(*miss)) for miss in misses]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client went away: stop waiting (shared pipeline runs still finish and cache)
+        for task in tasks:
+            task.cancel()
+
+
+def _refresh_in_background(url: str, key: str) -> None:
+    if key not in _refreshes:
+        _refreshes.start(key, lambda: _refresh(url, key))
+
+
+async def _refresh(url: str, key: str) -> None:
+    try:
+        r = await get_redis()
+        token = await acquire_lock(r, key, ANALYSIS_LOCK_TTL)
+        if token is None:
+            # Another worker is already refreshing or computing this key
+            return
+        try:
+            await _run_and_cache(url, key)
+        finally:
+            await release_lock(r, key, token)
+    except Exception:
+        logger.warning("Background refresh failed for %s", url, exc_info=True)
+
+
+async def _run_locked(url: str, key: str) -> Tuple[Any, bool]:
+    r = await get_redis()
+    token = await acquire_lock(r, key, ANALYSIS_LOCK_TTL)
+
+    if token is None:
+        cached = await _wait_for_result(r, url, key)
+        if cached is not None:
+            return cached, True
+        # The holder failed or its lock expired without a result; run it ourselves
+        token = await acquire_lock(r, key, ANALYSIS_LOCK_TTL)
+
+    try:
+        return await _run_and_cache(url, key), False
+    finally:
+        if token:
+            await release_lock(r, key, token)
+
+
+async def _run_and_cache(url: str, key: str) -> Any:
+    start = time.monotonic()
+    try:
+        analysis = await _run_pipeline(url)
+    except CacheableFailure as e:
+        await set_negative_cache(negative_key(url), e.status_code, e.detail)
+        raise
+    # The compute time (delta) decides how early XFetch starts refreshing this entry
+    await set_cache(key, analysis, ttl=CACHE_TTL, delta=time.monotonic() - start)
+    return analysis
+
+
+async def _wait_for_result(r, url: str, key: str) -> EncodedJSON | None:
+    """Poll the cache while another worker holds the lock for this key"""
+    deadline = time.monotonic() + ANALYSIS_LOCK_TTL
+    while time.monotonic() < deadline:
+        await asyncio.sleep(ANALYSIS_LOCK_POLL_INTERVAL)
+        entry = await get_cache_entry(key)
+        if entry:
+            return entry.body
+        if not await lock_exists(r, key):
+            # Lock released without a cached result: the holder's pipeline failed
+            entry = await get_cache_entry(key)
+            if entry:
+                return entry.body
+            failure = await get_negative_cache(negative_key(url))
+            if failure:
+                raise _cached_failure(failure)
+            return None
+    return None
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A pipeline step whose output is cached under its own key for `ttl` seconds"""
+
+    name: str
+    ttl: int
+
+
+SCRAPE = Stage("scrape", SCRAPE_CACHE_TTL)
+NLP = Stage("nlp", NLP_CACHE_TTL)
+
+
+def scrape_key(url: str) -> str:
+    return f"scrape:{url_hash(url)}"
+
+
+def nlp_key(scraped: Any) -> str:
+    return f"nlp:{NLP_MODEL_VERSION}:{content_hash(scraped)}"
+
+
+async def _run_stage(stage: Stage, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """Return the stage's cached output for `key`, or run it and cache the result"""
+    start = time.perf_counter()
+    result = await get_stage_cache(key)
+    if result is not None:
+        PIPELINE_STAGE_LATENCY.labels(stage.name, "true").observe(time.perf_counter() - start)
+        return result
+
+    result = await fn()
+    await set_stage_cache(key, result, stage.ttl)
+    PIPELINE_STAGE_LATENCY.labels(stage.name, "false").observe(time.perf_counter() - start)
+    return result
+
+
+async def _scrape(url: str) -> Any:
+    scrape_url = f"{WEB_SCRAPER_URL}/scrape?url={httpx_encode(url)}"
+    try:
+        scraped = await fetch_json(scrape_url, method="GET", service="web-scraper")
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        if status in NEGATIVE_CACHE_STATUSES:
+            raise CacheableFailure(status_code=status, detail=f"Scraper returned {status} for this URL") from e
+        raise
+    if not scraped or "content" not in scraped:
+        raise CacheableFailure(status_code=502, detail="Scraper returned no content")
+    return scraped
+
+
+async def _analyze_content(url: str, scraped: Any) -> Any:
+    nlp_req = {"url": url, "content": scraped}
+    return await fetch_json(f"{NLP_URL}/analyze", method="POST", json=nlp_req, service="nlp")
+
+
+async def _run_pipeline(url: str) -> Any:
+    """Scrape -> NLP, each stage cached on its own inputs.
+
+    A failed NLP call keeps the scraped content cached, and a new NLP_MODEL_VERSION
+    reuses it, so only the stages whose inputs changed are run again.
+    """
+    scraped = await _run_stage(SCRAPE, scrape_key(url), lambda: _scrape(url))
+    return await _run_stage(NLP, nlp_key(scraped), lambda: _analyze_content(url, scraped))
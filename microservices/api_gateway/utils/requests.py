@@ -1,6 +1,62 @@
-# async HTTP helper with timeout and simple retry
+# async HTTP helper with timeout and per-service circuit breaking
+import asyncio
+import time
+
 import httpx
-from config import HTTP_TIMEOUT
+from config import (
+    HTTP2,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_POOL_TIMEOUT,
+    HTTP_TIMEOUT,
+)
+from utils.circuit_breaker import CircuitOpenError, get_breaker
+from utils.health_prober import ServiceDownError, check_reachable
+from utils.metrics import DOWNSTREAM_IN_FLIGHT, DOWNSTREAM_LATENCY
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for this worker, created on first use"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT, pool=HTTP_POOL_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=HTTP2,
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def http_pool_stats() -> dict:
+    """Active, idle and waiting counts of the shared client's connection pool"""
+    # httpx doesn't expose pool state publicly, so read it defensively from httpcore
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    waiting = [r for r in getattr(pool, "_requests", []) if r.connection is None]
+    idle = sum(1 for c in connections if c.is_idle())
+    return {
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive": HTTP_MAX_KEEPALIVE,
+        "http2": HTTP2,
+        "connections": len(connections),
+        "active": len(connections) - idle,
+        "idle": idle,
+        "waiting": len(waiting),
+    }
 
 
 async def fetch_json(
@@ -8,12 +64,67 @@ async def fetch_json(
     method: str = "GET",
     json: dict | None = None,
     timeout: float | None = None,
+    service: str | None = None,
 ):
-    timeout = timeout or HTTP_TIMEOUT
-    async with httpx.AsyncClient(timeout=timeout) as client:
+    """Call a downstream and return its JSON body.
+
+    When `service` is given the call goes through that service's circuit breaker:
+    it raises CircuitOpenError immediately while the circuit is open, and transport
+    errors, timeouts, 5xx responses and unreadable bodies count as failures. It also raises
+    ServiceDownError (a CircuitOpenError) while the service fails its health probes.
+    """
+    label = service or "other"
+    breaker = get_breaker(service) if service else None
+    if breaker:
+        try:
+            check_reachable(service)
+            breaker.before_call()
+        except (CircuitOpenError, ServiceDownError):
+            DOWNSTREAM_LATENCY.labels(label, "circuit_open").observe(0)
+            raise
+
+    client = get_http_client()
+    # Per-call timeout overrides the client default; the pool wait limit stays the same
+    timeout = httpx.Timeout(timeout, pool=HTTP_POOL_TIMEOUT) if timeout else client.timeout
+    outcome = "ok"
+    in_flight = DOWNSTREAM_IN_FLIGHT.labels(label)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
         if method.upper() == "GET":
-            r = await client.get(url)
+            r = await client.get(url, timeout=timeout)
         else:
-            r = await client.post(url, json=json)
+            r = await client.post(url, json=json, timeout=timeout)
         r.raise_for_status()
-        return r.json()
+        body = r.json()
+    except httpx.HTTPStatusError as e:
+        outcome = "http_error"
+        if breaker:
+            if e.response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        raise
+    except httpx.TransportError:
+        outcome = "transport_error"
+        if breaker:
+            breaker.record_failure()
+        raise
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        if breaker:
+            breaker.release()
+        raise
+    except Exception:
+        # e.g. an undecodable or non-JSON body: the service answered, but not usably
+        outcome = "error"
+        if breaker:
+            breaker.record_failure()
+        raise
+    finally:
+        in_flight.dec()
+        DOWNSTREAM_LATENCY.labels(label, outcome).observe(time.perf_counter() - start)
+
+    if breaker:
+        breaker.record_success()
+    return body
@@ -0,0 +1,68 @@
+# request coalescing: concurrent callers for the same key share one execution
+import asyncio
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+# Delete the lock only if we still own it, so an expired lock taken over by another
+# worker is never released by the original holder
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Runs at most one coroutine per key at a time within this worker.
+
+    Callers arriving while a key is in flight await the same task. The work runs as its
+    own task, so a caller disconnecting does not cancel it for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, bool]:
+        """Start the work for a key unless it is already running, without waiting for it"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task, True
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task, False
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, shared) where shared is True if another caller started the work"""
+        task, shared = self.start(key, fn)
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+
+async def acquire_lock(r, key: str, ttl_s: float) -> str | None:
+    """Take a short Redis lock. Returns the owner token, or None if someone else holds it"""
+    token = uuid.uuid4().hex
+    if await r.set(f"lock:{key}", token, nx=True, px=int(ttl_s * 1000)):
+        return token
+    return None
+
+
+async def release_lock(r, key: str, token: str) -> None:
+    await r.eval(_RELEASE_LOCK, 1, f"lock:{key}", token)
+
+
+async def lock_exists(r, key: str) -> bool:
+    return bool(await r.exists(f"lock:{key}"))
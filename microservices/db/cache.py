@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from logging import getLogger
+from typing import Dict, Iterable, List, Optional
+
+import redis.asyncio as redis
+
+from .config import (
+    ARTICLE_CACHE_TTL,
+    ARTICLE_URL_CACHE_TTL,
+    ARTICLES_CHANGED_CHANNEL,
+    ARTICLES_VERSION_KEY,
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_PORT,
+)
+
+logger = getLogger("db_service.cache")
+
+_redis: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def article_key(article_id: uuid.UUID) -> str:
+    return f"db:article:{article_id}"
+
+
+def article_url_key(url: str) -> str:
+    return f"db:article-url:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+
+async def get_cached_articles(ids: List[uuid.UUID]) -> Dict[uuid.UUID, bytes]:
+    """Cached article JSON for the given ids, in one MGET. Redis errors count as misses"""
+    if not ids:
+        return {}
+    try:
+        bodies = await get_redis().mget([article_key(article_id) for article_id in ids])
+    except redis.RedisError as e:
+        logger.warning(f"Article cache read failed: {e!r}")
+        return {}
+    return {article_id: body for article_id, body in zip(ids, bodies) if body is not None}
+
+
+async def get_cached_article_id(url: str) -> Optional[uuid.UUID]:
+    try:
+        article_id = await get_redis().get(article_url_key(url))
+    except redis.RedisError as e:
+        logger.warning(f"Article cache read failed: {e!r}")
+        return None
+    return uuid.UUID(article_id.decode()) if article_id else None
+
+
+async def cache_articles(articles: Dict[uuid.UUID, bytes], urls: Dict[uuid.UUID, str]) -> None:
+    """Store article JSON by id and url -> id pointers, in one pipelined round trip"""
+    if not articles:
+        return
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for article_id, body in articles.items():
+                pipe.set(article_key(article_id), body, ex=ARTICLE_CACHE_TTL)
+                if article_id in urls:
+                    pipe.set(article_url_key(urls[article_id]), str(article_id), ex=ARTICLE_URL_CACHE_TTL)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Article cache write failed: {e!r}")
+
+
+async def articles_changed(ids: Iterable[uuid.UUID]) -> None:
+    """Call after a committed write: drops the articles' cache entries, bumps the articles
+    version and publishes the ids on ARTICLES_CHANGED_CHANNEL, in one transaction.
+
+    If Redis is unavailable the write still stands; cached copies expire with their TTL.
+    """
+    ids = [str(article_id) for article_id in ids]
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            if ids:
+                pipe.delete(*(article_key(article_id) for article_id in ids))
+            pipe.incr(ARTICLES_VERSION_KEY)
+            pipe.publish(ARTICLES_CHANGED_CHANNEL, json.dumps({"ids": ids}))
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Failed to publish change of {len(ids)} articles: {e!r}")
+
+
+async def listen_for_changes() -> None:
+    """Delete changed articles again when their change event arrives.
+
+    A read that fetched a row just before a write committed can cache the old version
+    after the writer's own delete; this second delete, a moment later, removes it.
+    """
+    while True:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(ARTICLES_CHANGED_CHANNEL)
+            async for message in pubsub.listen():
+                ids = json.loads(message["data"]).get("ids") or []
+                if ids:
+                    await get_redis().delete(*(article_key(article_id) for article_id in ids))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Article change listener failed, resubscribing: {e!r}")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
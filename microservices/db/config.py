@@ -1,3 +1,4 @@
+import socket
 from os import getenv
 
 from dotenv import load_dotenv
@@ -7,9 +8,62 @@ load_dotenv()
 # Service Configuration
 SERVICE_PORT = int(getenv("DB_SERVICE_PORT", 8001))
 
-# not currently in use
 POSTGRES_HOST = getenv("POSTGRES_HOST", "postgres")
 POSTGRES_PORT = int(getenv("POSTGRES_PORT", 5432))
 POSTGRES_DB = getenv("POSTGRES_DB", "sentinel_db")
 POSTGRES_USER = getenv("POSTGRES_USER", "sentinel_user")
 POSTGRES_PASSWORD = getenv("POSTGRES_PASSWORD", "sentinel_password")
+
+REDIS_HOST = getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(getenv("REDIS_PORT", 6379))
+REDIS_DB = int(getenv("REDIS_DB", 0))
+
+# Read-through article cache. Writers publish changed ids on ARTICLES_CHANGED_CHANNEL, drop
+# their cache entries and bump ARTICLES_VERSION_KEY (which also retires the gateway's
+# cached listing pages). url -> id pointers never change, so they live longer.
+ARTICLE_CACHE_TTL = int(getenv("ARTICLE_CACHE_TTL", 3600))
+ARTICLE_URL_CACHE_TTL = int(getenv("ARTICLE_URL_CACHE_TTL", 86400))
+ARTICLES_CHANGED_CHANNEL = getenv("ARTICLES_CHANGED_CHANNEL", "articles:changed")
+ARTICLES_VERSION_KEY = getenv("ARTICLES_VERSION_KEY", "articles:version")
+ARTICLES_BATCH_MAX = int(getenv("ARTICLES_BATCH_MAX", 500))
+
+# asyncpg connection pool, opened and closed with the app. Each connection keeps up to
+# DB_STATEMENT_CACHE_SIZE prepared statements, so repeated queries skip parse/plan.
+# Set it to 0 behind a transaction-pooling PgBouncer.
+DB_POOL_MIN_SIZE = int(getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(getenv("DB_POOL_MAX_SIZE", 10))
+DB_STATEMENT_CACHE_SIZE = int(getenv("DB_STATEMENT_CACHE_SIZE", 256))
+DB_MAX_CACHED_STATEMENT_LIFETIME = float(getenv("DB_MAX_CACHED_STATEMENT_LIFETIME", 3600))
+DB_MAX_INACTIVE_CONNECTION_LIFETIME = float(getenv("DB_MAX_INACTIVE_CONNECTION_LIFETIME", 300))
+DB_COMMAND_TIMEOUT = float(getenv("DB_COMMAND_TIMEOUT", 30))
+
+# Write-behind worker (stream_writer.py): drains pipeline streams into Postgres as
+# consumer group STREAM_WRITER_GROUP, flushing every STREAM_WRITER_BATCH_SIZE records or
+# STREAM_WRITER_FLUSH_INTERVAL_S seconds, whichever comes first. Messages Postgres rejects
+# are published to STREAM_WRITER_DEAD_LETTER_STREAM and acknowledged.
+STREAM_WRITER_STREAMS = [
+    stream.strip()
+    for stream in getenv("STREAM_WRITER_STREAMS", "ingestor:to.be.scraped, prioritised:to.be.scraped").split(",")
+    if stream.strip()
+]
+STREAM_WRITER_GROUP = getenv("STREAM_WRITER_GROUP", "db-writer")
+STREAM_WRITER_CONSUMER = getenv("STREAM_WRITER_CONSUMER", socket.gethostname())
+STREAM_WRITER_BATCH_SIZE = int(getenv("STREAM_WRITER_BATCH_SIZE", 500))
+STREAM_WRITER_FLUSH_INTERVAL_S = float(getenv("STREAM_WRITER_FLUSH_INTERVAL_S", 1.0))
+STREAM_WRITER_DEAD_LETTER_STREAM = getenv("STREAM_WRITER_DEAD_LETTER_STREAM", "db-writer:dead.letter")
+STREAM_WRITER_RETRY_S = float(getenv("STREAM_WRITER_RETRY_S", 5.0))
+
+# Most rows one bulk upsert request may carry
+DB_BULK_MAX_ROWS = int(getenv("DB_BULK_MAX_ROWS", 10000))
+
+# Largest page GET /articles returns
+ARTICLES_MAX_PAGE_SIZE = int(getenv("ARTICLES_MAX_PAGE_SIZE", 100))
+# Article embeddings (pgvector). Must match the vector(N) column in init.sql
+EMBEDDING_DIMENSIONS = int(getenv("EMBEDDING_DIMENSIONS", 1536))
+EMBEDDING_MODEL = getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+# HNSW candidate list size per query: higher is better recall, slower search
+EMBEDDING_EF_SEARCH = int(getenv("EMBEDDING_EF_SEARCH", 40))
+EMBEDDING_MAX_BATCH = int(getenv("EMBEDDING_MAX_BATCH", 1000))
+
+# Ranked search results can't be keyset-paginated, so deep offsets are refused
+ARTICLES_SEARCH_MAX_OFFSET = int(getenv("ARTICLES_SEARCH_MAX_OFFSET", 1000))
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+import asyncpg
+from pgvector.asyncpg import register_vector
+
+from .config import (
+    DB_COMMAND_TIMEOUT,
+    DB_MAX_CACHED_STATEMENT_LIFETIME,
+    DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
+    POSTGRES_DB,
+    POSTGRES_HOST,
+    POSTGRES_PASSWORD,
+    POSTGRES_PORT,
+    POSTGRES_USER,
+)
+
+_pool: Optional[asyncpg.Pool] = None
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamp columns are UTC without a zone; asyncpg refuses aware datetimes for them"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    # vector columns as lists/arrays instead of text
+    await register_vector(conn)
+
+
+async def open_pool() -> asyncpg.Pool:
+    """Create the shared pool; called once from the app lifespan"""
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            host=POSTGRES_HOST,
+            port=POSTGRES_PORT,
+            database=POSTGRES_DB,
+            user=POSTGRES_USER,
+            password=POSTGRES_PASSWORD,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+            command_timeout=DB_COMMAND_TIMEOUT,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+            max_cached_statement_lifetime=DB_MAX_CACHED_STATEMENT_LIFETIME,
+            init=_init_connection,
+        )
+    return _pool
+
+
+async def get_pool() -> asyncpg.Pool:
+    if _pool is None:
+        raise RuntimeError("Database pool is not open")
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def pool_stats() -> dict:
+    if _pool is None:
+        return {"open": False}
+    return {
+        "open": True,
+        "size": _pool.get_size(),
+        "idle": _pool.get_idle_size(),
+        "min_size": _pool.get_min_size(),
+        "max_size": _pool.get_max_size(),
+    }
+
+
+async def copy_upsert(staging_ddl: str, staging_table: str, columns: list[str], records, upsert_sql: str):
+    """Bulk upsert in a handful of round trips, whatever the number of rows.
+
+    Rows are COPYed into a per-connection temp table (created once, emptied on commit),
+    then merged with one INSERT ... SELECT ... ON CONFLICT statement, all in one
+    transaction. Returns the rows of upsert_sql's RETURNING clause.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn, conn.transaction():
+        await conn.execute(staging_ddl)
+        await conn.copy_records_to_table(staging_table, records=records, columns=columns)
+        return await conn.fetch(upsert_sql)
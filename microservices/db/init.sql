@@ -1,3 +1,84 @@
--- Enable pgvector extension
+-- Enable pgvector extension. Similarity search sets hnsw.iterative_scan, added in 0.8.
 CREATE EXTENSION IF NOT EXISTS vector;
+DO $$
+BEGIN
+    IF string_to_array((SELECT extversion FROM pg_extension WHERE extname = 'vector'), '.')::int[] < ARRAY[0, 8] THEN
+        RAISE EXCEPTION 'pgvector >= 0.8 is required (installed: %)',
+            (SELECT extversion FROM pg_extension WHERE extname = 'vector');
+    END IF;
+END $$;
 
+
+CREATE TABLE IF NOT EXISTS sources (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name VARCHAR(255) NOT NULL,
+    url TEXT UNIQUE NOT NULL,
+    category VARCHAR(100),
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS articles (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    url TEXT UNIQUE NOT NULL,
+    title TEXT,
+    content TEXT,
+    source_id UUID REFERENCES sources(id),
+    published_at TIMESTAMP,
+    analysis_status VARCHAR(50) NOT NULL DEFAULT 'pending',
+    -- header.message_id of the pipeline message that first carried the article, if any
+    message_id VARCHAR(64) UNIQUE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    -- Full-text document, kept up to date by Postgres; title matches rank above content matches
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+);
+
+-- Listing is keyset-paginated on (created_at, id), newest first. Each filter gets an index
+-- that leads with the filter column, so every page is one index range scan of `limit` rows
+-- no matter how deep it is.
+CREATE INDEX IF NOT EXISTS idx_articles_created_at_id ON articles (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_articles_status_created_at_id ON articles (analysis_status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_articles_source_created_at_id ON articles (source_id, created_at, id);
+
+-- Full-text search (GET /articles/search): search_vector @@ query is answered from this index
+CREATE INDEX IF NOT EXISTS idx_articles_search_vector ON articles USING GIN (search_vector);
+
+-- Article embeddings for similarity search. source_id and published_at are copied from the
+-- article so filters apply to the index scan itself instead of a join after it.
+CREATE TABLE IF NOT EXISTS article_embeddings (
+    article_id UUID NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    model_name VARCHAR(100) NOT NULL,
+    embedding_type VARCHAR(50) NOT NULL DEFAULT 'content',
+    embedding vector(1536) NOT NULL,
+    source_id UUID,
+    published_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (article_id, model_name, embedding_type)
+);
+
+-- HNSW rather than ivfflat: no training step, so it can be built on an empty table and
+-- stays accurate as rows arrive. Recall/latency is tuned per query with hnsw.ef_search.
+CREATE INDEX IF NOT EXISTS idx_article_embeddings_hnsw
+    ON article_embeddings USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX IF NOT EXISTS idx_article_embeddings_source_published
+    ON article_embeddings (source_id, published_at);
+
+-- Keep the copied filter columns in step with the article, in the same transaction as
+-- whatever changed it (bulk upserts, the stream writer, manual edits)
+CREATE OR REPLACE FUNCTION sync_article_embedding_filters() RETURNS trigger AS $$
+BEGIN
+    UPDATE article_embeddings
+    SET source_id = NEW.source_id, published_at = NEW.published_at
+    WHERE article_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_articles_sync_embedding_filters
+    AFTER UPDATE OF source_id, published_at ON articles
+    FOR EACH ROW
+    WHEN (OLD.source_id IS DISTINCT FROM NEW.source_id OR OLD.published_at IS DISTINCT FROM NEW.published_at)
+    EXECUTE FUNCTION sync_article_embedding_filters();
@@ -1,22 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager
 from logging import INFO, basicConfig, getLogger
 
 import uvicorn
 from fastapi import FastAPI
 
+from .cache import close_redis, listen_for_changes
 from .config import SERVICE_PORT
+from .database import close_pool, open_pool, pool_stats
+from .routers import articles, embeddings, sources
 
 # Configure logging
 basicConfig(level=INFO)
 logger = getLogger("db_service")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the connection pool and start the cache invalidation listener; undo both on shutdown"""
+    await open_pool()
+    listener = asyncio.create_task(listen_for_changes())
+    yield
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+    await close_redis()
+    await close_pool()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="Sentinel Database Service", version="0.1.0")
+app = FastAPI(title="Sentinel Database Service", version="0.1.0", lifespan=lifespan)
+app.include_router(articles.router)
+app.include_router(sources.router)
+app.include_router(embeddings.router)
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "database"}
+    return {"status": "healthy", "service": "database", "pool": pool_stats()}
 
 
 @app.get("/")
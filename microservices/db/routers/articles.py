@@ -0,0 +1,230 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from common.models.api.db_models import (
+    Article,
+    ArticleBatchRequest,
+    ArticleCreate,
+    ArticlePage,
+    ArticleSearchPage,
+    ArticleSearchResult,
+    ArticleStatusUpdate,
+    ArticleSummary,
+    BulkUpsertResult,
+)
+
+from ..cache import articles_changed, cache_articles, get_cached_article_id, get_cached_articles
+from ..config import ARTICLES_BATCH_MAX, ARTICLES_MAX_PAGE_SIZE, ARTICLES_SEARCH_MAX_OFFSET, DB_BULK_MAX_ROWS
+from ..database import copy_upsert, get_pool, naive_utc
+
+router = APIRouter(prefix="/articles", tags=["articles"])
+
+SUMMARY_COLUMNS = "id, url, title, source_id, published_at, analysis_status, created_at"
+ARTICLE_COLUMNS = f"{SUMMARY_COLUMNS}, content"
+
+STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS staging_articles (
+        seq INT, url TEXT, title TEXT, content TEXT, source_id UUID, published_at TIMESTAMP
+    ) ON COMMIT DELETE ROWS
+"""
+STAGING_COLUMNS = ["seq", "url", "title", "content", "source_id", "published_at"]
+
+# The last occurrence of a url in the request wins. xmax = 0 only for freshly inserted rows.
+UPSERT_FROM_STAGING = """
+    INSERT INTO articles (url, title, content, source_id, published_at)
+    SELECT DISTINCT ON (url) url, title, content, source_id, published_at
+    FROM staging_articles ORDER BY url, seq DESC
+    ON CONFLICT (url) DO UPDATE SET
+        title = COALESCE(EXCLUDED.title, articles.title),
+        content = COALESCE(EXCLUDED.content, articles.content),
+        source_id = COALESCE(EXCLUDED.source_id, articles.source_id),
+        published_at = COALESCE(EXCLUDED.published_at, articles.published_at)
+    RETURNING id, url, (xmax = 0) AS inserted
+"""
+
+
+def encode_cursor(created_at: datetime, article_id: uuid.UUID) -> str:
+    """Opaque cursor pointing just after an article in (created_at, id) order"""
+    raw = f"{created_at.isoformat()}|{article_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, article_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(article_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.post("/bulk", response_model=BulkUpsertResult)
+async def upsert_articles(articles: List[ArticleCreate]):
+    """Insert or update many articles by url: one COPY and one INSERT ... ON CONFLICT"""
+    if len(articles) > DB_BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {DB_BULK_MAX_ROWS} articles per request")
+    rows = await copy_upsert(
+        STAGING_DDL,
+        "staging_articles",
+        STAGING_COLUMNS,
+        [(seq, a.url, a.title, a.content, a.source_id, naive_utc(a.published_at)) for seq, a in enumerate(articles)],
+        UPSERT_FROM_STAGING,
+    )
+    await articles_changed(row["id"] for row in rows)
+    inserted = sum(row["inserted"] for row in rows)
+    return BulkUpsertResult(inserted=inserted, updated=len(rows) - inserted, items=[dict(row) for row in rows])
+
+
+@router.get("/search", response_model=ArticleSearchPage)
+async def search_articles(
+    q: str = Query(..., min_length=1, description="Search terms; supports \"phrases\", OR and -exclusions"),
+    limit: int = Query(20, ge=1, le=ARTICLES_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=ARTICLES_SEARCH_MAX_OFFSET),
+    status: Optional[str] = None,
+):
+    """Full-text search over title and content, best matches first.
+
+    Matching uses the GIN index on search_vector; only matching rows are ranked.
+    """
+    args = [q]
+    status_filter = ""
+    if status is not None:
+        args.append(status)
+        status_filter = f"AND analysis_status = ${len(args)}"
+    args.extend([limit + 1, offset])
+    query = f"""
+        SELECT {SUMMARY_COLUMNS}, ts_rank_cd(search_vector, query) AS rank
+        FROM articles, websearch_to_tsquery('english', $1) AS query
+        WHERE search_vector @@ query {status_filter}
+        ORDER BY rank DESC, created_at DESC, id DESC
+        LIMIT ${len(args) - 1} OFFSET ${len(args)}
+    """
+    pool = await get_pool()
+    rows = await pool.fetch(query, *args)
+
+    items = [ArticleSearchResult(**dict(row)) for row in rows[:limit]]
+    next_offset = offset + limit
+    if len(rows) <= limit or next_offset > ARTICLES_SEARCH_MAX_OFFSET:
+        next_offset = None
+    return ArticleSearchPage(items=items, next_offset=next_offset)
+
+
+@router.get("", response_model=ArticlePage)
+async def list_articles(
+    limit: int = Query(20, ge=1, le=ARTICLES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    source_id: Optional[uuid.UUID] = None,
+):
+    """List articles newest first, one page at a time.
+
+    Keyset pagination: the next page starts after the last (created_at, id) seen, so it is
+    an index range scan and costs the same at any depth, and rows inserted meanwhile
+    don't shift pages. Pass `next_cursor` back as `cursor` until it is null.
+    """
+    conditions, args = [], []
+    if status is not None:
+        args.append(status)
+        conditions.append(f"analysis_status = ${len(args)}")
+    if source_id is not None:
+        args.append(source_id)
+        conditions.append(f"source_id = ${len(args)}")
+    if cursor is not None:
+        args.extend(decode_cursor(cursor))
+        conditions.append(f"(created_at, id) < (${len(args) - 1}, ${len(args)})")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # One extra row tells whether there is a next page without a COUNT
+    args.append(limit + 1)
+    query = f"""
+        SELECT {SUMMARY_COLUMNS} FROM articles
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ${len(args)}
+    """
+    pool = await get_pool()
+    rows = await pool.fetch(query, *args)
+
+    items = [ArticleSummary(**dict(row)) for row in rows[:limit]]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(rows) > limit else None
+    return ArticlePage(items=items, next_cursor=next_cursor)
+
+
+async def load_articles(ids: List[uuid.UUID]) -> Dict[uuid.UUID, bytes]:
+    """Article JSON by id, read through the cache.
+
+    Hits come from one MGET and all misses from one query; the rows found are cached.
+    Ids that don't exist are absent from the result.
+    """
+    found = await get_cached_articles(ids)
+    misses = [article_id for article_id in dict.fromkeys(ids) if article_id not in found]
+    if misses:
+        pool = await get_pool()
+        rows = await pool.fetch(f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE id = ANY($1)", misses)
+        fresh = {row["id"]: Article(**dict(row)).model_dump_json().encode() for row in rows}
+        await cache_articles(fresh, {row["id"]: row["url"] for row in rows})
+        found.update(fresh)
+    return found
+
+
+def _json(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/by-url", response_model=Article)
+async def get_article_by_url(url: str = Query(..., min_length=1)):
+    """An article by its url. The url -> id mapping is cached alongside the article"""
+    article_id = await get_cached_article_id(url)
+    if article_id is not None:
+        body = (await load_articles([article_id])).get(article_id)
+        if body is not None:
+            return _json(body)
+
+    pool = await get_pool()
+    row = await pool.fetchrow(f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE url = $1", url)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    body = Article(**dict(row)).model_dump_json().encode()
+    await cache_articles({row["id"]: body}, {row["id"]: row["url"]})
+    return _json(body)
+
+
+@router.post("/batch")
+async def get_articles_batch(batch: ArticleBatchRequest):
+    """Many articles by id in one call: `items` in request order, unknown ids under `missing`"""
+    if len(batch.ids) > ARTICLES_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {ARTICLES_BATCH_MAX} ids per request")
+    found = await load_articles(batch.ids)
+    ids = list(dict.fromkeys(batch.ids))
+    # Cached bodies are already JSON, so they are spliced into the response as they are
+    items = b",".join(found[article_id] for article_id in ids if article_id in found)
+    missing = json.dumps([str(article_id) for article_id in ids if article_id not in found]).encode()
+    return _json(b'{"items":[' + items + b'],"missing":' + missing + b"}")
+
+
+@router.get("/{article_id}", response_model=Article)
+async def get_article(article_id: uuid.UUID):
+    body = (await load_articles([article_id])).get(article_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return _json(body)
+
+
+@router.put("/{article_id}/status", response_model=Article)
+async def update_article_status(article_id: uuid.UUID, update: ArticleStatusUpdate):
+    pool = await get_pool()
+    row = await pool.fetchrow(
+        f"UPDATE articles SET analysis_status = $2 WHERE id = $1 RETURNING {ARTICLE_COLUMNS}",
+        article_id,
+        update.analysis_status,
+    )
+    if row is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    await articles_changed([article_id])
+    return Article(**dict(row))
@@ -0,0 +1,176 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from common.models.api.db_models import ArticleEmbeddingBatch, SimilarArticle, SimilaritySearch
+
+from ..config import EMBEDDING_DIMENSIONS, EMBEDDING_EF_SEARCH, EMBEDDING_MAX_BATCH, EMBEDDING_MODEL
+from ..database import get_pool, naive_utc
+
+router = APIRouter(prefix="/embeddings", tags=["embeddings"])
+
+MAX_RESULTS = 100
+MAX_EF_SEARCH = 1000
+
+UPSERT_EMBEDDING = """
+    INSERT INTO article_embeddings (article_id, model_name, embedding_type, embedding, source_id, published_at)
+    SELECT a.id, $2, $3, $4, a.source_id, a.published_at FROM articles a WHERE a.id = $1
+    ON CONFLICT (article_id, model_name, embedding_type)
+    DO UPDATE SET
+        embedding = EXCLUDED.embedding,
+        source_id = EXCLUDED.source_id,
+        published_at = EXCLUDED.published_at,
+        created_at = NOW()
+"""
+
+
+def _check_dimensions(embedding: List[float]) -> None:
+    if len(embedding) != EMBEDDING_DIMENSIONS:
+        raise HTTPException(
+            status_code=422, detail=f"Embeddings must have {EMBEDDING_DIMENSIONS} dimensions, got {len(embedding)}"
+        )
+
+
+@router.post("/batch")
+async def store_embeddings(batch: ArticleEmbeddingBatch):
+    """Store many embeddings in one transaction and one round trip (pipelined executemany).
+
+    Articles that don't exist are skipped and listed under `missing`.
+    """
+    if len(batch.items) > EMBEDDING_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {EMBEDDING_MAX_BATCH} embeddings per batch")
+    for item in batch.items:
+        _check_dimensions(item.embedding)
+
+    ids = [item.article_id for item in batch.items]
+    pool = await get_pool()
+    async with pool.acquire() as conn, conn.transaction():
+        found = {row["id"] for row in await conn.fetch("SELECT id FROM articles WHERE id = ANY($1)", ids)}
+        await conn.executemany(
+            UPSERT_EMBEDDING,
+            [
+                (item.article_id, batch.model_name, batch.embedding_type, item.embedding)
+                for item in batch.items
+                if item.article_id in found
+            ],
+        )
+    return {"stored": len(found), "missing": [article_id for article_id in ids if article_id not in found]}
+
+
+async def _nearest(
+    embedding,
+    model_name: str,
+    embedding_type: str,
+    limit: int,
+    ef_search: Optional[int],
+    source_id: Optional[uuid.UUID] = None,
+    published_after: Optional[datetime] = None,
+    published_before: Optional[datetime] = None,
+    exclude_article_id: Optional[uuid.UUID] = None,
+) -> List[SimilarArticle]:
+    """Approximate nearest neighbours by cosine distance through the HNSW index.
+
+    Filters are applied during the index scan. With hnsw.iterative_scan the scan keeps
+    going until `limit` rows pass them, instead of returning whatever survived the first
+    ef_search candidates. relaxed_order can hand rows back slightly out of order, so the
+    materialized candidates are sorted again by exact distance.
+    """
+    if not 1 <= limit <= MAX_RESULTS:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {MAX_RESULTS}")
+    ef_search = ef_search or EMBEDDING_EF_SEARCH
+    if not 1 <= ef_search <= MAX_EF_SEARCH:
+        raise HTTPException(status_code=422, detail=f"ef_search must be between 1 and {MAX_EF_SEARCH}")
+
+    args = [embedding, model_name, embedding_type]
+    filters = []
+    for condition, value in (
+        ("source_id = ${}", source_id),
+        ("published_at >= ${}", naive_utc(published_after)),
+        ("published_at < ${}", naive_utc(published_before)),
+        ("article_id <> ${}", exclude_article_id),
+    ):
+        if value is not None:
+            args.append(value)
+            filters.append(condition.format(len(args)))
+    args.append(limit)
+    query = f"""
+        WITH candidates AS MATERIALIZED (
+            SELECT article_id, source_id, published_at, embedding <=> $1 AS distance
+            FROM article_embeddings
+            WHERE model_name = $2 AND embedding_type = $3 {"".join(" AND " + f for f in filters)}
+            ORDER BY embedding <=> $1
+            LIMIT ${len(args)}
+        )
+        SELECT * FROM candidates ORDER BY distance
+    """
+
+    pool = await get_pool()
+    async with pool.acquire() as conn, conn.transaction():
+        # Both settings are local to this transaction, so pooled connections stay at defaults.
+        # The candidate list can't be shorter than the number of results asked for.
+        await conn.execute(
+            "SELECT set_config('hnsw.ef_search', $1, true), set_config('hnsw.iterative_scan', 'relaxed_order', true)",
+            str(max(ef_search, limit)),
+        )
+        rows = await conn.fetch(query, *args)
+    return [
+        SimilarArticle(
+            article_id=row["article_id"],
+            similarity=1 - row["distance"],
+            source_id=row["source_id"],
+            published_at=row["published_at"],
+        )
+        for row in rows
+    ]
+
+
+@router.post("/search", response_model=List[SimilarArticle])
+async def search_embeddings(search: SimilaritySearch):
+    """Articles whose embeddings are closest to the given vector"""
+    _check_dimensions(search.embedding)
+    return await _nearest(
+        search.embedding,
+        search.model_name or EMBEDDING_MODEL,
+        search.embedding_type,
+        search.limit,
+        search.ef_search,
+        search.source_id,
+        search.published_after,
+        search.published_before,
+    )
+
+
+@router.get("/similar/{article_id}", response_model=List[SimilarArticle])
+async def similar_articles(
+    article_id: uuid.UUID,
+    limit: int = Query(10, ge=1, le=MAX_RESULTS),
+    ef_search: Optional[int] = Query(None, ge=1, le=MAX_EF_SEARCH),
+    model_name: str = EMBEDDING_MODEL,
+    embedding_type: str = "content",
+    source_id: Optional[uuid.UUID] = None,
+    published_after: Optional[datetime] = None,
+    published_before: Optional[datetime] = None,
+):
+    """Articles closest to a stored article's embedding, excluding the article itself"""
+    pool = await get_pool()
+    embedding = await pool.fetchval(
+        "SELECT embedding FROM article_embeddings WHERE article_id = $1 AND model_name = $2 AND embedding_type = $3",
+        article_id,
+        model_name,
+        embedding_type,
+    )
+    if embedding is None:
+        raise HTTPException(status_code=404, detail="No embedding stored for this article")
+    return await _nearest(
+        embedding,
+        model_name,
+        embedding_type,
+        limit,
+        ef_search,
+        source_id,
+        published_after,
+        published_before,
+        exclude_article_id=article_id,
+    )
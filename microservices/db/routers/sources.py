@@ -0,0 +1,45 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+
+from common.models.api.db_models import BulkUpsertResult, SourceCreate
+
+from ..config import DB_BULK_MAX_ROWS
+from ..database import copy_upsert
+
+router = APIRouter(prefix="/sources", tags=["sources"])
+
+STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS staging_sources (
+        seq INT, name VARCHAR(255), url TEXT, category VARCHAR(100), is_active BOOLEAN
+    ) ON COMMIT DELETE ROWS
+"""
+STAGING_COLUMNS = ["seq", "name", "url", "category", "is_active"]
+
+# The last occurrence of a url in the request wins. xmax = 0 only for freshly inserted rows.
+UPSERT_FROM_STAGING = """
+    INSERT INTO sources (name, url, category, is_active)
+    SELECT DISTINCT ON (url) name, url, category, is_active
+    FROM staging_sources ORDER BY url, seq DESC
+    ON CONFLICT (url) DO UPDATE SET
+        name = EXCLUDED.name,
+        category = COALESCE(EXCLUDED.category, sources.category),
+        is_active = EXCLUDED.is_active
+    RETURNING id, url, (xmax = 0) AS inserted
+"""
+
+
+@router.post("/bulk", response_model=BulkUpsertResult)
+async def upsert_sources(sources: List[SourceCreate]):
+    """Insert or update many sources by url: one COPY and one INSERT ... ON CONFLICT"""
+    if len(sources) > DB_BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {DB_BULK_MAX_ROWS} sources per request")
+    rows = await copy_upsert(
+        STAGING_DDL,
+        "staging_sources",
+        STAGING_COLUMNS,
+        [(seq, s.name, s.url, s.category, s.is_active) for seq, s in enumerate(sources)],
+        UPSERT_FROM_STAGING,
+    )
+    inserted = sum(row["inserted"] for row in rows)
+    return BulkUpsertResult(inserted=inserted, updated=len(rows) - inserted, items=[dict(row) for row in rows])
@@ -0,0 +1,307 @@
+"""
+Write-behind worker that persists articles flowing through the pipeline streams.
+
+Messages are read as consumer group STREAM_WRITER_GROUP, buffered in memory and written
+to Postgres in batches: one COPY + INSERT per flush, so database cost grows with the
+number of batches rather than the number of messages. A batch is acknowledged only
+after its transaction commits; if the worker dies before that, the messages stay
+pending and are replayed on the next start. Inserts are keyed by the message's
+header.message_id (and url), so a replayed batch changes nothing.
+
+Only connection failures are retried. A batch Postgres rejects (a DataError or a
+constraint violation) is split in half until the offending records are isolated; those,
+and messages that fail validation, go to STREAM_WRITER_DEAD_LETTER_STREAM and are
+acknowledged so they can't block the streams.
+
+Run with:
+    python -m microservices.db.stream_writer
+"""
+import asyncio
+import json
+import time
+from logging import INFO, basicConfig, getLogger
+from typing import Callable, List, Optional, Tuple
+
+import asyncpg
+import redis
+
+from common.redis_client.claim_check import ClaimCheckMissingError
+from common.redis_client.codecs import CodecError
+from common.redis_client.consumer_combiner import RedisConsumerCombiner
+from common.redis_client.publisher import RedisPublisher
+
+from .cache import articles_changed, close_redis
+from .config import (
+    STREAM_WRITER_BATCH_SIZE,
+    STREAM_WRITER_CONSUMER,
+    STREAM_WRITER_DEAD_LETTER_STREAM,
+    STREAM_WRITER_FLUSH_INTERVAL_S,
+    STREAM_WRITER_GROUP,
+    STREAM_WRITER_RETRY_S,
+    STREAM_WRITER_STREAMS,
+)
+from .database import close_pool, copy_upsert, open_pool
+
+basicConfig(level=INFO)
+logger = getLogger("db_service.stream_writer")
+
+STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS staging_stream_articles (
+        seq INT, message_id VARCHAR(64), url TEXT, source_rss TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+STAGING_COLUMNS = ["seq", "message_id", "url", "source_rss"]
+
+# DO NOTHING on any conflict: a message_id already stored (a replay, or the same article
+# read from both streams) or a url another writer inserted first leaves the row alone
+INSERT_FROM_STAGING = """
+    INSERT INTO articles (message_id, url, source_id)
+    SELECT DISTINCT ON (s.message_id) s.message_id, s.url, src.id
+    FROM staging_stream_articles s
+    LEFT JOIN sources src ON src.url = s.source_rss
+    ORDER BY s.message_id, s.seq
+    ON CONFLICT DO NOTHING
+    RETURNING id
+"""
+
+# articles.message_id is VARCHAR(64)
+MESSAGE_ID_MAX_LENGTH = 64
+
+# Failures worth retrying the whole flush for; anything else is a bug and stops the worker
+RETRYABLE_ERRORS = (
+    asyncpg.PostgresConnectionError,
+    OSError,
+    asyncio.TimeoutError,
+    redis.exceptions.ConnectionError,
+    redis.exceptions.TimeoutError,
+)
+# Postgres rejecting the rows themselves; retrying the same batch would fail forever
+RECORD_ERRORS = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+
+Record = Tuple[str, str, Optional[str]]
+
+
+class InvalidRecordError(ValueError):
+    """A message carries an article that can't be stored"""
+
+
+def to_record(message: dict) -> Optional[Record]:
+    """(message_id, url, source_rss) from a decoded stream message, or None if it has no article.
+
+    Raises InvalidRecordError for an article Postgres would reject.
+    """
+    payload = message.get("data")
+    if not hasattr(payload, "get"):
+        return None
+    header = payload.get("header") or {}
+    data = payload.get("data") or {}
+    if not isinstance(data, dict) or not header.get("message_id") or not data.get("url"):
+        return None
+    message_id, url, source_rss = header["message_id"], data["url"], data.get("source_rss")
+    if not isinstance(message_id, str) or len(message_id) > MESSAGE_ID_MAX_LENGTH:
+        raise InvalidRecordError(f"message_id must be a string of at most {MESSAGE_ID_MAX_LENGTH} characters")
+    if not isinstance(url, str) or not (source_rss is None or isinstance(source_rss, str)):
+        raise InvalidRecordError("url and source_rss must be strings")
+    if "\x00" in url or (source_rss and "\x00" in source_rss):
+        raise InvalidRecordError("url and source_rss can't contain NUL characters")
+    return message_id, url, source_rss
+
+
+class StreamWriter:
+    """Buffers stream messages and writes them to Postgres in size- or time-bounded batches"""
+
+    def __init__(
+        self,
+        combiner: RedisConsumerCombiner,
+        dead_letters: RedisPublisher,
+        batch_size: int,
+        flush_interval_s: float,
+    ):
+        self.combiner = combiner
+        self.dead_letters = dead_letters
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+
+        # Records keep their message so a rejected one can be dead-lettered
+        self._records: List[Tuple[Record, dict]] = []
+        self._invalid: List[Tuple[dict, str]] = []
+        self._acks: List[Tuple[str, str]] = []
+        self._oldest: Optional[float] = None
+
+    def _add(self, messages: List[dict]) -> None:
+        for message in messages:
+            try:
+                record = to_record(message)
+            except InvalidRecordError as e:
+                logger.warning(f"Message {message['redis_message_id']} has an invalid article: {e}")
+                self._invalid.append((message, str(e)))
+            else:
+                if record is None:
+                    logger.warning(f"Skipping message {message['redis_message_id']} without an article")
+                else:
+                    self._records.append((record, message))
+            # Skipped and invalid messages are acknowledged with the batch so they aren't redelivered
+            self._acks.append((message["stream"], message["redis_message_id"]))
+        if self._acks and self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def _read_pending(self) -> Optional[List[dict]]:
+        """Messages read before the last shutdown but never acknowledged, or None once none
+        are left (runs in a thread).
+
+        consume_pending acknowledges trimmed and corrupt entries instead of returning them,
+        so an empty batch only ends the replay if nothing is pending any more.
+        """
+        messages = self.combiner.consume_pending(self.batch_size, raise_errors=True)
+        if not messages and not self.combiner.has_pending():
+            return None
+        return _resolved(messages)
+
+    def _read_new(self) -> List[dict]:
+        """New messages, blocking at most until the next time-based flush (runs in a thread)"""
+        wait_s = self.flush_interval_s
+        if self._oldest is not None:
+            wait_s = max(0.0, self._oldest + self.flush_interval_s - time.monotonic())
+        room = max(1, self.batch_size - len(self._acks))
+        return _resolved(self.combiner.consume_many(room, block=max(1, int(wait_s * 1000)), raise_errors=True))
+
+    async def _read(self, read: Callable[[], Optional[List[dict]]]) -> Optional[List[dict]]:
+        """Run a read in a thread. If Redis fails, wait STREAM_WRITER_RETRY_S and return no messages"""
+        try:
+            return await asyncio.to_thread(read)
+        except Exception as e:
+            logger.error(f"Reading from {self.combiner.streams} failed, retrying in {STREAM_WRITER_RETRY_S}s: {e!r}")
+            await asyncio.sleep(STREAM_WRITER_RETRY_S)
+            return []
+
+    def _due(self) -> bool:
+        if not self._acks:
+            return False
+        return len(self._acks) >= self.batch_size or time.monotonic() - self._oldest >= self.flush_interval_s
+
+    async def _store(self, records: List[Tuple[Record, dict]]) -> Tuple[List[dict], List[Tuple[dict, str]]]:
+        """Write records in one transaction, halving the batch while Postgres rejects it.
+
+        Returns the inserted rows and the (message, error) pairs of records rejected on
+        their own. Halves that commit stay committed if a later half fails to connect;
+        the retry then finds them already stored.
+        """
+        try:
+            stored = await copy_upsert(
+                STAGING_DDL,
+                "staging_stream_articles",
+                STAGING_COLUMNS,
+                [(seq, *record) for seq, (record, _) in enumerate(records)],
+                INSERT_FROM_STAGING,
+            )
+            return stored, []
+        except RECORD_ERRORS as e:
+            if len(records) == 1:
+                message = records[0][1]
+                logger.warning(f"Message {message['redis_message_id']} was rejected by Postgres: {e!r}")
+                return [], [(message, repr(e))]
+        middle = len(records) // 2
+        stored, rejected = await self._store(records[:middle])
+        more_stored, more_rejected = await self._store(records[middle:])
+        return stored + more_stored, rejected + more_rejected
+
+    def _dead_letter(self, rejected: List[Tuple[dict, str]]) -> None:
+        """Publish rejected messages to the dead-letter stream (runs in a thread)"""
+        entries = [
+            {
+                "stream": message["stream"],
+                "redis_message_id": message["redis_message_id"],
+                "error": error,
+                # Serialised here so an odd payload can't make the publish fail as well
+                "payload": json.dumps(message.get("data"), default=str),
+            }
+            for message, error in rejected
+        ]
+        if self.dead_letters.publish_many(entries) is None:
+            # publish_many reports failures by returning None; keep the messages pending
+            raise redis.exceptions.ConnectionError(f"Publishing to {self.dead_letters.stream_name} failed")
+
+    async def flush(self) -> None:
+        """Write the buffer, dead-letter what Postgres rejects, then acknowledge it all.
+
+        Retries until Postgres and Redis are reachable again.
+        """
+        while self._acks:
+            try:
+                stored, rejected = [], []
+                if self._records:
+                    stored, rejected = await self._store(self._records)
+                rejected = self._invalid + rejected
+                if rejected:
+                    await asyncio.to_thread(self._dead_letter, rejected)
+                acknowledged = await asyncio.to_thread(self.combiner.acknowledge_many, self._acks)
+            except RETRYABLE_ERRORS as e:
+                # Nothing is acknowledged, so the buffer is retried here or replayed after a restart
+                logger.error(f"Flush of {len(self._acks)} messages failed, retrying in {STREAM_WRITER_RETRY_S}s: {e!r}")
+                await asyncio.sleep(STREAM_WRITER_RETRY_S)
+                continue
+            logger.info(
+                f"Flushed {len(self._acks)} messages: {len(stored)} new articles, "
+                f"{len(rejected)} dead-lettered, {acknowledged} acknowledged"
+            )
+            if stored:
+                # New rows aren't cached yet, but listings that would include them are
+                await articles_changed(row["id"] for row in stored)
+            self._records, self._invalid, self._acks, self._oldest = [], [], [], None
+
+    async def run(self) -> None:
+        # Replay whatever was read but not acknowledged before the last shutdown
+        while (messages := await self._read(self._read_pending)) is not None:
+            self._add(messages)
+            await self.flush()
+
+        while True:
+            self._add(await self._read(self._read_new))
+            if self._due():
+                await self.flush()
+
+
+def _resolved(messages: List[dict]) -> List[dict]:
+    """Materialise claim-checked bodies (ClaimCheckPayload mappings) while still in the thread.
+
+    A body that expired or can't be decoded becomes None, so the message is skipped and
+    acknowledged with its batch instead of failing every read.
+    """
+    resolved = []
+    for message in messages:
+        if hasattr(message["data"], "items") and not isinstance(message["data"], dict):
+            try:
+                message = dict(message, data=dict(message["data"].items()))
+            except (ClaimCheckMissingError, CodecError) as e:
+                logger.warning(f"Message {message['redis_message_id']} has an unreadable body: {e}")
+                message = dict(message, data=None)
+        resolved.append(message)
+    return resolved
+
+
+async def main() -> None:
+    await open_pool()
+    combiner = RedisConsumerCombiner(
+        streams=STREAM_WRITER_STREAMS,
+        group_name=STREAM_WRITER_GROUP,
+        consumer_name=STREAM_WRITER_CONSUMER,
+    )
+    writer = StreamWriter(
+        combiner,
+        RedisPublisher(STREAM_WRITER_DEAD_LETTER_STREAM),
+        STREAM_WRITER_BATCH_SIZE,
+        STREAM_WRITER_FLUSH_INTERVAL_S,
+    )
+    try:
+        await writer.run()
+    finally:
+        # Unflushed messages are still pending and get replayed on the next start
+        await close_redis()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Shutdown signal received.")
@@ -50,7 +50,7 @@ class BaseIngestor:
 
         # Step 2: Check if article has already been seen
         all_links = list(unique_articles_map.keys())
-        unseen_article_links = self.duplicate_filter.has_many(all_links)
+        unseen_article_links = self.duplicate_filter.has_many_in_batches(all_links)
         if not unseen_article_links:
             print("--- Ingestion cycle finished. Seen all articles already. ---\n\n")
             return
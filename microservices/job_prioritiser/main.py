@@ -16,9 +16,11 @@ BATCH_SIZE = 10
 def prioritize_messages(messages: list) -> list:
     """
     Sorts a list of message dictionaries based on the PRIORITY_MAP.
+
+    Only the message header is read, so claim-checked bodies are never fetched here.
     """
     def get_priority(message):
-        message_type = message.get('data', {}).get('type')
+        message_type = message.get('data', {}).get('header', {}).get('type')
         return PRIORITY_MAP.get(message_type, LOWEST_PRIORITY)
     return sorted(messages, key=get_priority)
 
@@ -44,7 +46,8 @@ def exec():
         prioritized_messages = prioritize_messages(messages)
         print(f"--> Messages are in priority order. Publishing")
 
-   
+
+        published = []
         for message in prioritized_messages:
             stream = message['stream']
             redis_msg_id = message['redis_message_id']
@@ -52,8 +55,12 @@ def exec():
             if not publisher.publish_one(message_data):
                 print(f"Failed to publish {redis_msg_id}. Skipping...")
                 continue
-            combiner.acknowledge(stream, redis_msg_id)
-            print(f"  - Acknowledged Msg ID {redis_msg_id}")
+            published.append((stream, redis_msg_id))
+
+        # One pipelined XACK round trip for the whole batch
+        if published:
+            acknowledged = combiner.acknowledge_many(published)
+            print(f"  - Acknowledged {acknowledged} of {len(prioritized_messages)} messages")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Compares article search strategies on a generated table (default 1M articles)
+
+    ilike  title || content ILIKE '%term%'; a sequential scan of every article
+    fts    search_vector @@ websearch_to_tsquery(...) ranked by ts_rank_cd, as in
+           GET /articles/search (microservices/db/routers/articles.py), via the GIN index
+
+Builds the table in a scratch `benchmark` schema with the same search_vector definition
+as microservices/db/init.sql, then reports p50/p99 latency and match counts for common
+and rare queries, and the plan the fts query gets. The schema is dropped afterwards
+unless --keep is given, so repeat runs can reuse it with --reuse.
+
+Usage (from project root, against a local Postgres):
+    python -m scripts.benchmarks.article_search --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import asyncpg
+
+WORDS = (
+    "the minister government said report economy policy market election court health "
+    "climate energy price rate bank growth security border trade official statement "
+    "announced increase decline percent million year week spokesperson agency data "
+    "inflation parliament vaccine drought wildfire ceasefire tariff semiconductor "
+    "pension strike refinery glacier lithium"
+).split()
+
+SCHEMA = """
+CREATE SCHEMA IF NOT EXISTS benchmark;
+CREATE TABLE benchmark.articles (
+    id BIGSERIAL PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    content TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+);
+"""
+
+# Words are drawn with a skewed distribution (random()^3), so early words are common and
+# late ones rare, which gives queries of very different selectivity. `g * 0` keeps the
+# subqueries correlated so every row gets its own text.
+FILL = """
+INSERT INTO benchmark.articles (url, title, content, created_at)
+SELECT
+    'https://news.example.com/article-' || g,
+    (SELECT string_agg(w[1 + floor(array_length(w, 1) * power(random(), 3))::int], ' ')
+     FROM generate_series(1, 8 + g * 0)),
+    (SELECT string_agg(w[1 + floor(array_length(w, 1) * power(random(), 3))::int], ' ')
+     FROM generate_series(1, $3 + g * 0)),
+    NOW() - (g || ' seconds')::interval
+FROM generate_series($1::bigint, $2::bigint) AS g, (SELECT $4::text[] AS w) AS words
+"""
+
+QUERIES = {
+    "ilike": """
+        SELECT id, title FROM benchmark.articles
+        WHERE title || ' ' || content ILIKE '%' || $1 || '%'
+        ORDER BY created_at DESC LIMIT $2
+    """,
+    "fts": """
+        SELECT id, title, ts_rank_cd(search_vector, query) AS rank
+        FROM benchmark.articles, websearch_to_tsquery('english', $1) AS query
+        WHERE search_vector @@ query
+        ORDER BY rank DESC, created_at DESC, id DESC LIMIT $2
+    """,
+}
+
+SEARCHES = ["glacier", "lithium refinery", '"wildfire drought"', "tariff -semiconductor", "economy"]
+
+
+async def build(conn, rows: int, content_words: int, batch: int):
+    await conn.execute("DROP SCHEMA IF EXISTS benchmark CASCADE")
+    await conn.execute(SCHEMA)
+    start = time.perf_counter()
+    for first in range(1, rows + 1, batch):
+        last = min(first + batch - 1, rows)
+        await conn.execute(FILL, first, last, content_words, WORDS)
+        print(f"  inserted {last:,} rows", end="\r", flush=True)
+    print(f"  inserted {rows:,} rows in {time.perf_counter() - start:.0f}s")
+
+    start = time.perf_counter()
+    await conn.execute("CREATE INDEX ON benchmark.articles USING GIN (search_vector)")
+    await conn.execute("ANALYZE benchmark.articles")
+    print(f"  GIN index built in {time.perf_counter() - start:.0f}s")
+
+
+async def time_query(conn, sql: str, term: str, limit: int, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await conn.fetch(sql, term, limit)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[max(0, int(len(latencies) * 0.99) - 1)]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--content-words", type=int, default=120)
+    parser.add_argument("--batch", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20, help="runs per fts query")
+    parser.add_argument("--ilike-repeat", type=int, default=3, help="runs per ilike query (each is a full scan)")
+    parser.add_argument("--reuse", action="store_true", help="reuse the table from a previous --keep run")
+    parser.add_argument("--keep", action="store_true", help="don't drop the benchmark schema")
+    parser.add_argument("--host", default=os.getenv("POSTGRES_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("POSTGRES_PORT", 5432)))
+    parser.add_argument("--database", default=os.getenv("POSTGRES_DB", "sentinel_db"))
+    parser.add_argument("--user", default=os.getenv("POSTGRES_USER", "sentinel_user"))
+    parser.add_argument("--password", default=os.getenv("POSTGRES_PASSWORD", "sentinel_password"))
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(
+        host=args.host, port=args.port, database=args.database, user=args.user, password=args.password
+    )
+    try:
+        if not args.reuse:
+            print(f"Building benchmark.articles with {args.rows:,} rows")
+            await build(conn, args.rows, args.content_words, args.batch)
+
+        print(f"\n{'query':<26}{'strategy':<10}{'matches':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for term in SEARCHES:
+            matches = await conn.fetchval(
+                "SELECT count(*) FROM benchmark.articles WHERE search_vector @@ websearch_to_tsquery('english', $1)",
+                term,
+            )
+            for strategy, sql in QUERIES.items():
+                # ILIKE has no notion of phrases or operators, so it gets the bare words
+                search = term if strategy == "fts" else term.split()[0].strip('"-')
+                repeat = args.repeat if strategy == "fts" else args.ilike_repeat
+                p50, p99 = await time_query(conn, sql, search, args.limit, repeat)
+                print(f"{term:<26}{strategy:<10}{matches:>10,}{p50 * 1e3:>10.1f}{p99 * 1e3:>10.1f}")
+
+        plan = await conn.fetch("EXPLAIN " + QUERIES["fts"], SEARCHES[0], args.limit)
+        print("\nfts plan:")
+        for row in plan:
+            print("  " + row[0])
+    finally:
+        if not args.keep:
+            await conn.execute("DROP SCHEMA IF EXISTS benchmark CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Measures recall and latency of HNSW similarity search against exact (brute force) search
+
+Loads clustered random vectors into a scratch `benchmark` schema shaped like
+article_embeddings in microservices/db/init.sql, builds the same HNSW index, then for
+each hnsw.ef_search value reports recall@k against the exact neighbours (computed with
+numpy) and p50/p99 query latency. Exact search in Postgres (index disabled) is timed as
+the baseline. A second pass repeats the runs with a source filter, with and without
+hnsw.iterative_scan, to show filtered recall and that the plan stays on the index.
+
+Usage (from project root, against a local Postgres with pgvector >= 0.8):
+    python -m scripts.benchmarks.embedding_search --rows 200000 --dimensions 384
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import asyncpg
+import numpy as np
+from pgvector.asyncpg import register_vector
+
+SOURCES = 50
+
+SEARCH = """
+    SELECT id FROM benchmark.article_embeddings {where}
+    ORDER BY embedding <=> $1 LIMIT $2
+"""
+
+
+def generate(rows: int, dimensions: int, clusters: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Unit vectors around `clusters` centres (embeddings of related articles cluster), with a source each"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, rows)] + 0.5 * rng.normal(size=(rows, dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, rng.integers(0, SOURCES, rows)
+
+
+async def build(conn, vectors: np.ndarray, sources: np.ndarray, m: int, ef_construction: int):
+    dimensions = vectors.shape[1]
+    await conn.execute("DROP SCHEMA IF EXISTS benchmark CASCADE")
+    await conn.execute("CREATE SCHEMA benchmark")
+    await conn.execute(
+        f"CREATE TABLE benchmark.article_embeddings (id INT PRIMARY KEY, source_id INT, embedding vector({dimensions}))"
+    )
+    start = time.perf_counter()
+    await conn.copy_records_to_table(
+        "article_embeddings",
+        schema_name="benchmark",
+        records=((i, int(source), vector) for i, (source, vector) in enumerate(zip(sources, vectors))),
+        columns=["id", "source_id", "embedding"],
+    )
+    print(f"  loaded {len(vectors):,} vectors in {time.perf_counter() - start:.0f}s")
+
+    start = time.perf_counter()
+    await conn.execute("SET maintenance_work_mem = '1GB'")
+    await conn.execute(
+        "CREATE INDEX ON benchmark.article_embeddings USING hnsw (embedding vector_cosine_ops) "
+        f"WITH (m = {m}, ef_construction = {ef_construction})"
+    )
+    await conn.execute("CREATE INDEX ON benchmark.article_embeddings (source_id)")
+    await conn.execute("ANALYZE benchmark.article_embeddings")
+    print(f"  HNSW index built in {time.perf_counter() - start:.0f}s")
+
+
+def exact_neighbours(vectors: np.ndarray, sources: np.ndarray, queries: np.ndarray, k: int, source=None):
+    """Ground truth by cosine similarity (vectors are unit length, so a dot product)"""
+    candidates = np.arange(len(vectors)) if source is None else np.flatnonzero(sources == source)
+    scores = queries @ vectors[candidates].T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return [set(candidates[row].tolist()) for row in top]
+
+
+async def run(conn, queries, truth, k: int, where: str = "", args=()):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        rows = await conn.fetch(SEARCH.format(where=where), query, k, *args)
+        latencies.append(time.perf_counter() - start)
+        hits += len(expected & {row["id"] for row in rows})
+    latencies.sort()
+    recall = hits / (k * len(queries))
+    return recall, statistics.median(latencies), latencies[max(0, int(len(latencies) * 0.99) - 1)]
+
+
+def report(label: str, recall: float, p50: float, p99: float):
+    print(f"{label:<34}{recall:>8.3f}{p50 * 1e3:>10.2f}{p99 * 1e3:>10.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160, 320])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="don't drop the benchmark schema")
+    parser.add_argument("--host", default=os.getenv("POSTGRES_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("POSTGRES_PORT", 5432)))
+    parser.add_argument("--database", default=os.getenv("POSTGRES_DB", "sentinel_db"))
+    parser.add_argument("--user", default=os.getenv("POSTGRES_USER", "sentinel_user"))
+    parser.add_argument("--password", default=os.getenv("POSTGRES_PASSWORD", "sentinel_password"))
+    args = parser.parse_args()
+
+    vectors, sources = generate(args.rows, args.dimensions, args.clusters, args.seed)
+    # Queries are perturbed copies of stored vectors, like "more like this article"
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.integers(0, args.rows, args.queries)]
+    queries = queries + 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    conn = await asyncpg.connect(
+        host=args.host, port=args.port, database=args.database, user=args.user, password=args.password
+    )
+    try:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        await register_vector(conn)
+        print(f"Building benchmark.article_embeddings with {args.rows:,} x {args.dimensions} vectors")
+        await build(conn, vectors, sources, args.m, args.ef_construction)
+
+        truth = exact_neighbours(vectors, sources, queries, args.k)
+        print(f"\n{'unfiltered':<34}{'recall':>8}{'p50 ms':>10}{'p99 ms':>10}")
+        await conn.execute("SET enable_indexscan = off")
+        report("exact (no index)", *await run(conn, queries[:20], truth[:20], args.k))
+        await conn.execute("RESET enable_indexscan")
+        for ef in args.ef_search:
+            await conn.execute(f"SET hnsw.ef_search = {ef}")
+            report(f"hnsw ef_search={ef}", *await run(conn, queries, truth, args.k))
+
+        source = 0
+        truth = exact_neighbours(vectors, sources, queries, args.k, source=source)
+        where = "WHERE source_id = $3"
+        print(f"\n{f'source_id = {source} (1/{SOURCES} of rows)':<34}{'recall':>8}{'p50 ms':>10}{'p99 ms':>10}")
+        for mode in ("off", "relaxed_order"):
+            await conn.execute(f"SET hnsw.iterative_scan = {mode}")
+            for ef in args.ef_search:
+                await conn.execute(f"SET hnsw.ef_search = {ef}")
+                report(f"iterative_scan={mode} ef={ef}", *await run(conn, queries, truth, args.k, where, (source,)))
+
+        plan = await conn.fetch("EXPLAIN " + SEARCH.format(where=where), queries[0], args.k, source)
+        print("\nfiltered plan (iterative_scan=relaxed_order):")
+        for row in plan:
+            print("  " + row[0])
+    finally:
+        if not args.keep:
+            await conn.execute("DROP SCHEMA IF EXISTS benchmark CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
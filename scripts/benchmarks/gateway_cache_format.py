@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Compares the API gateway's analysis cache formats (microservices/api_gateway/utils/cache_format.py)
+
+    legacy  json.dumps(value) as text; a hit is json.loads + re-encoding for the response
+    binary  header + zlib(compact JSON); a hit is decompress + splice into the response
+
+Reports stored size and per-hit CPU time for each format and, if Redis is reachable,
+the memory used per key (MEMORY USAGE) and the end-to-end hit latency (GET + decode).
+
+Usage (from project root):
+    python -m scripts.benchmarks.gateway_cache_format --entries 2000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import redis
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "microservices", "api_gateway"))
+
+from utils.cache_format import decode_entry, dumps, encode_entry, wrap  # noqa: E402
+
+
+WORDS = (
+    "the minister government said report economy policy market election court health "
+    "climate energy price rate bank growth security border trade official statement "
+    "announced increase decline percent million year week spokesperson agency data"
+).split()
+
+
+def sample_analysis(i: int, claims: int) -> dict:
+    """Roughly the shape and size of an NLP analysis"""
+    rng = random.Random(i)
+
+    def text(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    return {
+        "url": f"https://news.example.com/world/2025/11/06/article-{i}",
+        "summary": text(80),
+        "sentiment": {"label": "neutral", "score": rng.random()},
+        "entities": [{"text": text(2).title(), "type": "ORG", "salience": rng.random()} for _ in range(40)],
+        "claims": [
+            {
+                "text": text(25),
+                "verdict": rng.choice(["supported", "refuted", "unverified"]),
+                "confidence": rng.random(),
+                "evidence": [f"https://source.example.org/{i}/{j}/{k}" for k in range(3)],
+            }
+            for j in range(claims)
+        ],
+    }
+
+
+def legacy_hit(raw: bytes) -> bytes:
+    value = json.loads(raw)
+    return json.dumps({"cached": True, "data": value}).encode("utf-8")
+
+
+def binary_hit(raw: bytes) -> bytes:
+    body, _, _ = decode_entry(raw)
+    return wrap(body, cached=True)
+
+
+FORMATS = {
+    "legacy": (lambda value: json.dumps(value).encode("utf-8"), legacy_hit),
+    "binary": (lambda value: encode_entry(dumps(value), time.time() + 3600, 1.0), binary_hit),
+}
+
+
+def time_hits(hit, stored):
+    start = time.perf_counter()
+    for raw in stored:
+        hit(raw)
+    return (time.perf_counter() - start) / len(stored)
+
+
+def redis_measurements(client, name, hit, stored):
+    keys = [f"benchmark:cache:{name}:{i}" for i in range(len(stored))]
+    pipe = client.pipeline(transaction=False)
+    for key, raw in zip(keys, stored):
+        pipe.set(key, raw)
+    pipe.execute()
+
+    memory = sum(client.memory_usage(key, samples=0) for key in keys) / len(keys)
+    latencies = []
+    for key in keys:
+        start = time.perf_counter()
+        hit(client.get(key))
+        latencies.append(time.perf_counter() - start)
+    client.delete(*keys)
+
+    latencies.sort()
+    return memory, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--claims", type=int, default=30)
+    parser.add_argument("--host", default=os.getenv("REDIS_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("REDIS_PORT", 6379)))
+    args = parser.parse_args()
+
+    analyses = [sample_analysis(i, args.claims) for i in range(args.entries)]
+    client = redis.Redis(host=args.host, port=args.port)
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        print(f"Redis not reachable at {args.host}:{args.port}. Skipping memory and latency measurements.")
+        client = None
+
+    print(
+        f"{'format':<8}{'stored B':>10}{'hit cpu us':>12}{'redis B/key':>13}"
+        f"{'p50 hit us':>12}{'p99 hit us':>12}"
+    )
+    for name, (encode, hit) in FORMATS.items():
+        stored = [encode(value) for value in analyses]
+        size = sum(len(raw) for raw in stored) / len(stored)
+        cpu = time_hits(hit, stored)
+        memory, p50, p99 = (
+            redis_measurements(client, name, hit, stored) if client else (float("nan"),) * 3
+        )
+        print(
+            f"{name:<8}{size:>10.0f}{cpu * 1e6:>12.1f}{memory:>13.0f}"
+            f"{p50 * 1e6:>12.1f}{p99 * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
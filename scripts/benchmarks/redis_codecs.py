@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the stream payload codecs in common/redis_client/codecs.py
+
+Reports encode/decode throughput for each codec and, if Redis is reachable,
+the memory used per stream entry (MEMORY USAGE on a scratch stream).
+
+Usage (from project root):
+    python -m scripts.benchmarks.redis_codecs --messages 20000
+"""
+import argparse
+import datetime
+import hashlib
+import os
+import time
+
+import redis
+
+from common.redis_client.codecs import encode_fields, get_codec
+
+
+def sample_message(i: int) -> dict:
+    link = f"https://news.example.com/world/2025/11/06/article-{i}"
+    return {
+        "header": {
+            "message_id": hashlib.md5(link.encode()).hexdigest(),
+            "timestamp": datetime.datetime.now().isoformat(),
+            "type": "background",
+        },
+        "data": {"url": link, "source_rss": "https://news.example.com/rss.xml"},
+    }
+
+
+def time_codec(codec, messages):
+    start = time.perf_counter()
+    encoded = [codec.encode(message) for message in messages]
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in encoded:
+        codec.decode(data)
+    decode_s = time.perf_counter() - start
+
+    avg_size = sum(len(data) for data in encoded) / len(encoded)
+    return encode_s, decode_s, avg_size
+
+
+def stream_bytes_per_message(client, codec, messages):
+    stream = f"benchmark:codec:{codec.name}"
+    client.delete(stream)
+    pipe = client.pipeline(transaction=False)
+    for message in messages:
+        pipe.xadd(stream, encode_fields(message, codec))
+    pipe.execute()
+    used = client.memory_usage(stream, samples=0)
+    client.delete(stream)
+    return used / len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--codecs", default="json,msgpack")
+    parser.add_argument("--host", default=os.getenv("REDIS_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("REDIS_PORT", 6379)))
+    args = parser.parse_args()
+
+    messages = [sample_message(i) for i in range(args.messages)]
+    client = redis.Redis(host=args.host, port=args.port)
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        print(f"Redis not reachable at {args.host}:{args.port}. Skipping memory measurements.")
+        client = None
+
+    print(f"{'codec':<10}{'encode msg/s':>15}{'decode msg/s':>15}{'payload B':>12}{'redis B/msg':>14}")
+    for name in args.codecs.split(","):
+        codec = get_codec(name.strip())
+        encode_s, decode_s, avg_size = time_codec(codec, messages)
+        memory = stream_bytes_per_message(client, codec, messages) if client else float("nan")
+        print(
+            f"{codec.name:<10}{len(messages) / encode_s:>15,.0f}{len(messages) / decode_s:>15,.0f}"
+            f"{avg_size:>12.1f}{memory:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/bin/bash
+set -e
+
+# Starts (or stops) a local 6-node Redis Cluster (3 primaries, 3 replicas) on ports 7000-7005
+# for testing REDIS_CLUSTER mode. Then run services with:
+#   REDIS_CLUSTER=true REDIS_CLUSTER_NODES=127.0.0.1:7000,127.0.0.1:7001,127.0.0.1:7002
+#
+# Usage: ./scripts/redis_cli/local_cluster.sh [up|down]
+
+# --- Configuration ---
+IMAGE="redis:alpine"
+CONTAINER_PREFIX="sentinel-redis-cluster"
+PORTS=(7000 7001 7002 7003 7004 7005)
+
+# --- Color Definitions ---
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+NC='\033[0m' # No Color
+
+cluster_up() {
+	local nodes=()
+	for port in "${PORTS[@]}"; do
+		echo -e "${GREEN}--> Starting node on port ${YELLOW}${port}${NC}"
+		sudo docker run -d --rm --net host --name "${CONTAINER_PREFIX}-${port}" "$IMAGE" \
+			redis-server --port "$port" --cluster-enabled yes \
+			--cluster-config-file "nodes-${port}.conf" --cluster-node-timeout 5000 \
+			--appendonly no --save "" > /dev/null
+		nodes+=("127.0.0.1:${port}")
+	done
+
+	sleep 1
+	echo -e "\n${GREEN}--> Creating cluster${NC}"
+	sudo docker exec "${CONTAINER_PREFIX}-${PORTS[0]}" \
+		redis-cli --cluster create "${nodes[@]}" --cluster-replicas 1 --cluster-yes
+
+	echo -e "\n${GREEN}--> Cluster info${NC}"
+	sudo docker exec "${CONTAINER_PREFIX}-${PORTS[0]}" redis-cli -p "${PORTS[0]}" CLUSTER INFO | head -7
+}
+
+cluster_down() {
+	for port in "${PORTS[@]}"; do
+		echo -e "${GREEN}--> Stopping node on port ${YELLOW}${port}${NC}"
+		sudo docker rm -f "${CONTAINER_PREFIX}-${port}" > /dev/null 2>&1 || true
+	done
+}
+
+# --- Main Execution ---
+case "${1:-up}" in
+	up) cluster_up ;;
+	down) cluster_down ;;
+	*) echo "Usage: $0 [up|down]" && exit 1 ;;
+esac